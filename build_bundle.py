@@ -0,0 +1,249 @@
+import argparse
+import hashlib
+import importlib.util
+import os
+import py_compile
+import re
+import sys
+import tempfile
+import time
+import zipfile
+
+# Builds the wiping station into one zipapp (shunya.pyz) for the boot USB.
+#
+# Every module, the application's and its dependencies', is stored as
+# precompiled, sourceless bytecode, so a cold boot reads one archive
+# sequentially instead of hundreds of small files, and never compiles
+# anything on read-only media. Packages with native extensions cannot be
+# imported from a zip; they are stored under native/ and extracted to
+# /tmp (RAM on SystemRescue) on the first start after each boot.
+#
+# The bytecode is specific to the Python version that builds the bundle,
+# which must match the one on the boot media.
+
+# Top-level modules that are not part of the wiping station, besides test_*
+EXCLUDED_MODULES = {"build_bundle"}
+
+# Extension modules and shared libraries, versioned ones (libfoo.so.6) included
+NATIVE_REGEX = re.compile(r"\.(?:so|pyd|dylib)(?:\.\d+)*$")
+
+# Pure-Python packages that open their data files by path, so they are
+# extracted along with the native ones (reportlab's fonts).
+EXTRACT_PACKAGES = {"reportlab"}
+
+NATIVE_PREFIX = "native/"
+
+# Fixed timestamp so identical inputs give an identical archive
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+LAUNCHER_TEMPLATE = '''import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import zipfile
+
+# Launcher generated by build_bundle.py.
+
+BOOT_STARTED = time.perf_counter()
+
+BUILD_ID = {build_id!r}
+PYTHON_VERSION = {python_version!r}
+NATIVE_PREFIX = {native_prefix!r}
+EXTRACT_ROOT = os.environ.get("SHUNYA_EXTRACT_DIR", "/tmp")
+
+# Read by shunya's --startup-report
+BUNDLE_INFO = {{"buildId": BUILD_ID}}
+
+def is_private_dir(path):
+    """True if `path` is a real directory owned by this user that no one else can touch."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.geteuid() and stat.S_IMODE(st.st_mode) == 0o700
+
+def extract_native(archive):
+    """Extracts the native packages once per build; returns (directory, extracted).
+
+    The directory is only reused if it is private to this user. Anyone can
+    create a name under /tmp, so an existing one that is not gets bypassed
+    for a fresh private copy.
+    """
+    target = os.path.join(EXTRACT_ROOT, f"shunya-{{BUILD_ID}}")
+    if is_private_dir(target):
+        return target, False
+    staging = tempfile.mkdtemp(prefix=f"shunya-{{BUILD_ID}}.", dir=EXTRACT_ROOT)
+    with zipfile.ZipFile(archive) as bundle:
+        for info in bundle.infolist():
+            if not info.filename.startswith(NATIVE_PREFIX) or info.is_dir():
+                continue
+            path = os.path.join(staging, info.filename[len(NATIVE_PREFIX):])
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            with bundle.open(info) as source, open(path, "wb") as f:
+                shutil.copyfileobj(source, f)
+            os.chmod(path, (info.external_attr >> 16) & 0o755 or 0o644)
+    try:
+        os.rename(staging, target)
+    except OSError:
+        if not is_private_dir(target):
+            return staging, True  # Untrusted name in the way; keep the private copy
+        shutil.rmtree(staging, ignore_errors=True)  # Another instance got there first
+    return target, True
+
+def main():
+    if tuple(sys.version_info[:2]) != PYTHON_VERSION:
+        sys.exit(f"This bundle was built for Python {{PYTHON_VERSION[0]}}.{{PYTHON_VERSION[1]}}.")
+    archive = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    native_dir, extracted = extract_native(archive)
+    sys.path.insert(1, native_dir)
+    BUNDLE_INFO.update({{
+        "archive": archive,
+        "nativeDir": native_dir,
+        "extracted": extracted,
+        "extractSeconds": round(time.perf_counter() - start, 4),
+        "launcherSeconds": round(time.perf_counter() - BOOT_STARTED, 4),
+    }})
+
+    import shunya
+    sys.exit(shunya.main(sys.argv[1:] or ["gui"]))
+
+if __name__ == "__main__":
+    main()
+'''
+
+def app_files(app_dir):
+    """Yields (archive path, file path) for the application's modules."""
+    for name in sorted(os.listdir(app_dir)):
+        if name.endswith(".py") and name[:-3] not in EXCLUDED_MODULES and not name.startswith("test_"):
+            yield name, os.path.join(app_dir, name)
+
+def library_files(libs_dir):
+    """Yields (archive path, bytes) for dependencies installed in `libs_dir`.
+
+    Accepts a `pip install --target` tree and/or the wheels left there by
+    `pip download`.
+    """
+    for name in sorted(os.listdir(libs_dir)):
+        path = os.path.join(libs_dir, name)
+        if name.endswith(".whl"):
+            with zipfile.ZipFile(path) as wheel:
+                for info in wheel.infolist():
+                    if not info.is_dir() and ".data/" not in info.filename:
+                        yield info.filename, wheel.read(info)
+        elif os.path.isdir(path):
+            if name in ("__pycache__", "bin"):
+                continue
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+                for file_name in sorted(files):
+                    if file_name.endswith(".pyc"):
+                        continue
+                    file_path = os.path.join(root, file_name)
+                    with open(file_path, "rb") as f:
+                        yield os.path.relpath(file_path, libs_dir).replace(os.sep, "/"), f.read()
+        elif name.endswith(".py") or NATIVE_REGEX.search(name):
+            with open(path, "rb") as f:
+                yield name, f.read()
+
+def top_level_name(archive_path):
+    name = archive_path.split("/", 1)[0]
+    return name.split(".", 1)[0] if "/" not in archive_path else name
+
+def native_packages(files):
+    """Returns the top-level names that must be extracted to the file system."""
+    names = set(EXTRACT_PACKAGES)
+    for archive_path in files:
+        if NATIVE_REGEX.search(archive_path):
+            names.add(top_level_name(archive_path))
+    return names
+
+def compile_source(source, archive_path, work_dir):
+    """Returns hash-based, unchecked bytecode for a module's source, or None on a syntax error."""
+    source_path = os.path.join(work_dir, "module.py")
+    with open(source_path, "wb") as f:
+        f.write(source)
+    try:
+        compiled_path = py_compile.compile(
+            source_path, cfile=os.path.join(work_dir, "module.pyc"), dfile=archive_path, doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    except py_compile.PyCompileError as e:
+        print(f"Skipping {archive_path}: {e.msg.strip().splitlines()[-1]}", file=sys.stderr)
+        return None
+    with open(compiled_path, "rb") as f:
+        return f.read()
+
+def build_bundle(output, app_dir=".", libs_dirs=()):
+    """Writes the bundle to `output` and returns a summary dict."""
+    start = time.perf_counter()
+    files = {}
+    for archive_path, path in app_files(app_dir):
+        with open(path, "rb") as f:
+            files[archive_path] = f.read()
+    for libs_dir in libs_dirs:
+        for archive_path, data in library_files(libs_dir):
+            files.setdefault(archive_path, data)
+
+    extracted = native_packages(files)
+    build_id = hashlib.sha256()
+    entries = {}
+    modules = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        for archive_path in sorted(files):
+            data = files[archive_path]
+            if archive_path.endswith(".py"):
+                data = compile_source(data, archive_path, work_dir)
+                if data is None:
+                    continue
+                archive_path += "c"
+                modules += 1
+            if top_level_name(archive_path) in extracted:
+                archive_path = NATIVE_PREFIX + archive_path
+            build_id.update(archive_path.encode("utf-8") + b"\0" + hashlib.sha256(data).digest())
+            entries[archive_path] = data
+
+        build_id = build_id.hexdigest()[:12]
+        launcher = LAUNCHER_TEMPLATE.format(
+            build_id=build_id, python_version=tuple(sys.version_info[:2]), native_prefix=NATIVE_PREFIX)
+        entries["__main__.pyc"] = compile_source(launcher.encode("utf-8"), "__main__.py", work_dir)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    temp_output = output + ".tmp"
+    with open(temp_output, "wb") as f:
+        f.write(b"#!/usr/bin/env python3\n")
+        with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as bundle:
+            for archive_path, data in sorted(entries.items()):
+                info = zipfile.ZipInfo(archive_path, ZIP_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                executable = NATIVE_REGEX.search(archive_path) is not None
+                info.external_attr = (0o755 if executable else 0o644) << 16
+                bundle.writestr(info, data)
+    os.chmod(temp_output, 0o755)
+    os.replace(temp_output, output)
+
+    return {
+        "output": output,
+        "buildId": build_id,
+        "pythonVersion": "%d.%d" % sys.version_info[:2],
+        "magic": importlib.util.MAGIC_NUMBER.hex(),
+        "files": len(entries),
+        "modules": modules,
+        "extractedPackages": sorted(extracted & {top_level_name(p) for p in files}),
+        "bytes": os.path.getsize(output),
+        "buildSeconds": round(time.perf_counter() - start, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the single-file shunya.pyz bundle for the boot USB.")
+    parser.add_argument("--output", default=os.path.join("dist", "shunya.pyz"))
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--libs", action="append", default=[],
+                        help="dependency directory (pip install --target, or wheels from pip download); repeatable")
+    args = parser.parse_args()
+    summary = build_bundle(args.output, args.app_dir, args.libs)
+    print(f"Built {summary['output']} ({summary['bytes'] // 1024} KiB, {summary['modules']} modules, "
+          f"build {summary['buildId']}, Python {summary['pythonVersion']})")
+    if summary["extractedPackages"]:
+        print(f"Extracted to /tmp at start-up: {', '.join(summary['extractedPackages'])}")
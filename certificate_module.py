@@ -1,75 +1,189 @@
 
 import json
+import os
+import urllib.parse
+import urllib.request
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import serialization
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import qrcode
 
-def create_certificate_data(disk_info):
-    """Creates the certificate data structure from lsblk info."""
-    return {
+from qr_payload import encode_certificate
+
+from verify_module import (
+    batch_root_message,
+    certificate_message,
+    key_algorithm,
+    key_id,
+    merkle_leaf,
+    merkle_node,
+    short_digest,
+    sign_message,
+)
+
+# Verification service that QR codes link to and stations register with.
+VERIFIER_URL = "https://sdwv-verifier.com"
+
+# Embed the whole signed certificate in the QR code (compressed CBOR in
+# Base45) so it verifies without the registry, instead of a short link.
+OFFLINE_QR_CODES = False
+
+def create_certificate_data(disk_info, wipe_report=None):
+    """Creates the certificate data structure from lsblk info.
+
+    `wipe_report` holds the fields recorded by the wipe itself (for example
+    the "wipeMethod" actually used) and overrides the defaults below.
+    """
+    certificate_data = {
         "certificateId": str(uuid.uuid4()),
         "deviceModel": disk_info.get('model', 'N/A'),
         "deviceSerial": disk_info.get('serial', 'N/A'), # lsblk doesn't typically provide serial
         "deviceSize": disk_info.get('size', 'N/A'),
-        "wipeMethod": "NIST SP 800-88 Purge (Simulated)", # This is currently a simulation
+        "wipeMethod": "NIST SP 800-88 Purge (Simulated)", # Used when no wipe report is given
         "wipeTimestamp": datetime.utcnow().isoformat() + "Z",
         "status": "Success",
     }
+    if wipe_report:
+        certificate_data.update(wipe_report)
+    return certificate_data
+
+class CertificateSigner:
+    """Signs certificates with a private key that is loaded and parsed once.
+
+    Create one at startup and reuse it; sign_many() signs a batch on a
+    thread pool and returns the signatures in input order. RSA, Ed25519 and
+    P-256 keys are supported; the scheme follows the key type.
+    """
+    def __init__(self, private_key_path, max_workers=None):
+        with open(private_key_path, "rb") as key_file:
+            self.private_key = serialization.load_pem_private_key(
+                key_file.read(),
+                password=None,
+            )
+        self.algorithm = key_algorithm(self.private_key)
+        self.key_id = key_id(self.private_key.public_key())
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+
+    def sign(self, certificate_data):
+        """Signs the certificate data with the private key.
+
+        Adds the "signatureAlgorithm" and "keyId" fields to `certificate_data`
+        first, so they are covered by the signature.
+        """
+        certificate_data["signatureAlgorithm"] = self.algorithm
+        certificate_data["keyId"] = self.key_id
+        # IMPORTANT: The signature is created from the certificate data *before* the signature itself is added.
+        # This exact dictionary structure must be recreated by the verifier.
+        return sign_message(self.private_key, certificate_message(certificate_data))
+
+    def sign_many(self, certificates):
+        """Signs a list of certificates and returns their signatures in the same order."""
+        certificates = list(certificates)
+        if len(certificates) <= 1 or self.max_workers == 1:
+            return [self.sign(certificate) for certificate in certificates]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.sign, certificates))
+
+    def sign_batch(self, certificates):
+        """Signs a whole session of certificates with one signature.
+
+        Builds a Merkle tree over the certificates and signs only its root.
+        Each certificate gets a "batchProof" (root, index, size and the
+        sibling path) and the returned list holds the root signature once
+        per certificate, matching sign_many().
+        """
+        certificates = list(certificates)
+        if not certificates:
+            return []
+        for certificate_data in certificates:
+            certificate_data.pop("batchProof", None)
+            certificate_data["signatureAlgorithm"] = self.algorithm
+            certificate_data["keyId"] = self.key_id
+
+        levels = build_merkle_tree([merkle_leaf(certificate_data) for certificate_data in certificates])
+        root = levels[-1][0]
+        signature = sign_message(self.private_key, batch_root_message(root))
+        for index, certificate_data in enumerate(certificates):
+            certificate_data["batchProof"] = {
+                "root": root.hex(),
+                "index": index,
+                "size": len(certificates),
+                "path": merkle_proof(levels, index),
+            }
+        return [signature] * len(certificates)
+
+def build_merkle_tree(leaves):
+    """Returns the tree levels, leaves first; the last level holds the root.
+
+    An unpaired node at the end of a level is carried up unchanged.
+    """
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [merkle_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_proof(levels, index):
+    """Returns the inclusion proof of leaf `index` as [side, hex hash] pairs."""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(["L" if sibling < index else "R", level[sibling].hex()])
+        index //= 2
+    return path
 
 def sign_certificate(certificate_data, private_key_path):
-    """Signs the certificate data with the private key."""
-    with open(private_key_path, "rb") as key_file:
-        private_key = serialization.load_pem_private_key(
-            key_file.read(),
-            password=None,
-        )
-
-    # IMPORTANT: The signature is created from the certificate data *before* the signature itself is added.
-    # This exact dictionary structure must be recreated by the verifier.
-    certificate_string = json.dumps(certificate_data, sort_keys=True).encode('utf-8')
-
-    signature = private_key.sign(
-        certificate_string,
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()),
-            salt_length=padding.MGF1.MAX_LENGTH
-        ),
-        hashes.SHA256()
-    )
-    return signature
+    """Signs the certificate data with the private key.
+
+    Loads the key on every call; prefer a long-lived CertificateSigner.
+    """
+    return CertificateSigner(private_key_path).sign(certificate_data)
 
 from reportlab.lib.utils import ImageReader
 from textwrap import wrap
-import os
 
-def generate_pdf_certificate(certificate_data, signature, qr_code_path, file_path):
-    """Generates a PDF certificate with a QR code and wrapped signature."""
-    c = canvas.Canvas(file_path, pagesize=letter)
-    width, height = letter
+# Name of the reusable form holding the static page header in reports.
+REPORT_HEADER_FORM = "certificateHeader"
 
+def certificate_text_lines(certificate_data):
+    """Returns the "key: value" lines printed for a certificate."""
+    lines = []
+    for key, value in certificate_data.items():
+        if key == "batchProof":
+            value = f"certificate {value['index'] + 1} of {value['size']}, Merkle root {value['root'][:16]}..."
+        lines.append(f"{key}: {value}")
+    return lines
+
+def draw_certificate_header(c):
+    """Draws the static part of a certificate page."""
+    width, height = letter
     c.setFont("Helvetica", 12)
     c.drawString(100, height - 100, "Certificate of Data Erasure")
+
+def draw_certificate_body(c, lines, signature_lines, qr_code):
+    """Draws the certificate fields, wrapped signature and QR code of a page."""
+    width, height = letter
+    c.setFont("Helvetica", 12)
     y_position = height - 140
-    for key, value in certificate_data.items():
-        c.drawString(100, y_position, f"{key}: {value}")
+    for line in lines:
+        c.drawString(100, y_position, line)
         y_position -= 20
-    
+
     y_position -= 10
     c.drawString(100, y_position, "Signature:")
     y_position -= 15
 
     # Switch to a monospace font for the signature
     c.setFont("Courier", 10)
-    sig_hex = signature.hex()
-    # Wrap the signature hex string at a safe width
-    wrapped_sig = wrap(sig_hex, 65)
-    for line in wrapped_sig:
+    for line in signature_lines:
         c.drawString(120, y_position, line)
         y_position -= 12 # Line spacing for the smaller font
 
@@ -77,21 +191,125 @@ def generate_pdf_certificate(certificate_data, signature, qr_code_path, file_pat
     c.setFont("Helvetica", 12)
 
     # Embed the QR code
-    if os.path.exists(qr_code_path):
-        qr_img = ImageReader(qr_code_path)
+    if isinstance(qr_code, list):
+        draw_qr_code(c, qr_code, width - 220, 80, 140)
+    elif qr_code and os.path.exists(qr_code):
+        qr_img = ImageReader(qr_code)
         c.drawImage(qr_img, width - 220, 80, width=140, height=140, preserveAspectRatio=True, mask='auto')
 
+def generate_pdf_certificate(certificate_data, signature, qr_code, file_path):
+    """Generates a PDF certificate with a QR code and wrapped signature.
+
+    `qr_code` is a matrix from generate_qr_code(), drawn as vectors, or
+    the path of a QR image.
+    """
+    c = canvas.Canvas(file_path, pagesize=letter)
+    draw_certificate_header(c)
+    # Wrap the signature hex string at a safe width
+    draw_certificate_body(c, certificate_text_lines(certificate_data), wrap(signature.hex(), 65), qr_code)
     c.save()
 
-def generate_json_certificate(certificate_data, signature, file_path):
-    """Generates a JSON certificate."""
+def prepare_report_page(entry):
+    """Prepares one report page for generate_session_report().
+
+    Returns (lines, signature_lines, qr_matrix). Also writes the
+    certificate's individual PDF when the entry has a "pdf_path".
+    """
+    certificate_data = entry["certificate_data"]
+    signature = entry["signature"]
+    qr_code = entry.get("qr_code")
+    if qr_code is None:
+        qr_code = generate_qr_code(certificate_qr_data(dict(certificate_data, signature=signature.hex())))
+    if entry.get("pdf_path"):
+        generate_pdf_certificate(certificate_data, signature, qr_code, entry["pdf_path"])
+    return certificate_text_lines(certificate_data), wrap(signature.hex(), 65), qr_code
+
+def generate_pdf_report(entries, file_path):
+    """Generates one multi-page PDF report for a whole wipe session.
+
+    `entries` are dicts with "certificate_data" and "signature", and
+    optionally "qr_code" (a matrix; generated when missing) and "pdf_path"
+    (also write that certificate's individual PDF). Pages are rendered
+    in-process, since this runs on a thread of the GUI (where forking is
+    unsafe). The static header is drawn once, as a form every page reuses.
+    """
+    entries = list(entries)
+    c = canvas.Canvas(file_path, pagesize=letter)
+    c.setTitle("Data Erasure Report")
+    c.beginForm(REPORT_HEADER_FORM)
+    draw_certificate_header(c)
+    c.endForm()
+
+    for number, entry in enumerate(entries, 1):
+        lines, signature_lines, qr_code = prepare_report_page(entry)
+        c.doForm(REPORT_HEADER_FORM)
+        draw_certificate_body(c, lines, signature_lines, qr_code)
+        c.setFont("Helvetica", 9)
+        c.drawString(100, 40, f"Certificate {number} of {len(entries)}")
+        c.showPage()
+    c.save()
+
+def certificate_json(certificate_data, signature):
+    """Returns the JSON certificate text."""
     certificate_data_with_signature = certificate_data.copy()
     certificate_data_with_signature["signature"] = signature.hex()
+    return json.dumps(certificate_data_with_signature, indent=4)
+
+def generate_json_certificate(certificate_data, signature, file_path):
+    """Generates a JSON certificate."""
     with open(file_path, "w") as f:
-        json.dump(certificate_data_with_signature, f, indent=4)
+        f.write(certificate_json(certificate_data, signature))
+
+def verification_url(certificate_with_signature, base_url=VERIFIER_URL):
+    """Returns the short verification link for a registered certificate.
+
+    It carries only the certificate id and a digest prefix, which keeps
+    the QR code small; the service looks the certificate up by id.
+    """
+    certificate_id = urllib.parse.quote(str(certificate_with_signature["certificateId"]), safe="")
+    return f"{base_url}/verify/{certificate_id}?d={short_digest(certificate_with_signature)}"
+
+def certificate_qr_data(certificate_with_signature, offline=None):
+    """Returns the QR code contents for a signed certificate.
+
+    A short registry link by default; with `offline` (default
+    OFFLINE_QR_CODES) the certificate itself as a compact payload.
+    """
+    if offline is None:
+        offline = OFFLINE_QR_CODES
+    if offline:
+        return encode_certificate(certificate_with_signature)
+    return verification_url(certificate_with_signature)
 
-def generate_qr_code(data, file_path):
-    """Generates a QR code from the given data."""
+def register_certificates(certificates_with_signature, base_url=VERIFIER_URL, timeout=10):
+    """Registers signed certificates with the verification service.
+
+    Sends them as one NDJSON request and returns the service's response
+    ({"accepted": n, "rejected": [...]}). Raises OSError if the service
+    cannot be reached.
+    """
+    body = "".join(json.dumps(certificate) + "\n" for certificate in certificates_with_signature).encode("utf-8")
+    request = urllib.request.Request(
+        f"{base_url}/api/certificates",
+        data=body,
+        headers={"Content-Type": "application/x-ndjson"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+def generate_qr_code(data, file_path=None):
+    """Generates a QR code from the given data.
+
+    `data` may also be a signed certificate dict, which is embedded as a
+    compact payload. Upper-case payloads are encoded in the denser QR
+    alphanumeric mode automatically.
+
+    Returns the module matrix (rows of booleans, quiet zone included);
+    a PNG is only written when `file_path` is given.
+    """
+    if isinstance(data, dict):
+        data = encode_certificate(data)
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -101,5 +319,29 @@ def generate_qr_code(data, file_path):
     qr.add_data(data)
     qr.make(fit=True)
 
-    img = qr.make_image(fill='black', back_color='white')
-    img.save(file_path)
+    if file_path is not None:
+        img = qr.make_image(fill='black', back_color='white')
+        img.save(file_path)
+    return qr.get_matrix()
+
+def draw_qr_code(c, matrix, x, y, size):
+    """Draws a QR matrix onto a reportlab canvas as vector squares.
+
+    Each run of dark modules in a row is one rectangle, so the code stays
+    sharp at any print size and no image is embedded.
+    """
+    module = size / len(matrix)
+    c.saveState()
+    c.setFillColorRGB(0, 0, 0)
+    for row_index, row in enumerate(matrix):
+        row_y = y + size - (row_index + 1) * module
+        column = 0
+        while column < len(row):
+            if not row[column]:
+                column += 1
+                continue
+            start = column
+            while column < len(row) and row[column]:
+                column += 1
+            c.rect(x + start * module, row_y, (column - start) * module, module, stroke=0, fill=1)
+    c.restoreState()
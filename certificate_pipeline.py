@@ -0,0 +1,100 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from certificate_module import (
+    CertificateSigner,
+    certificate_json,
+    certificate_qr_data,
+    create_certificate_data,
+    generate_pdf_certificate,
+    generate_pdf_report,
+    generate_qr_code,
+)
+
+class CertificatePipeline:
+    """Issues a session's certificates on a background thread.
+
+    prepare() is called while the wipe is finishing (its final pass): it
+    loads the signing key and warms up the QR and PDF code. issue() then
+    creates, signs and renders everything and returns a Future of the
+    finished artifacts, so the GUI only displays them and saving is a
+    plain file write. Both run on one worker thread, in order.
+    """
+    def __init__(self, private_key_path):
+        self.private_key_path = private_key_path
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.prepared = None
+        self.signer = None
+
+    def prepare(self):
+        """Starts loading the key and warming up rendering; safe to call repeatedly."""
+        if self.prepared is None:
+            self.prepared = self.executor.submit(self._prepare)
+        return self.prepared
+
+    def _prepare(self):
+        self.signer = CertificateSigner(self.private_key_path)
+        # First use of qrcode and reportlab loads tables and font metrics
+        generate_pdf_certificate({}, b"", generate_qr_code("WARMUP"), io.BytesIO())
+
+    def issue(self, disks, wipe_reports):
+        """Issues certificates for `disks`; `wipe_reports` maps disk names to wipe reports.
+
+        Returns a Future of a dict with "certificates" (one dict per disk:
+        disk, certificate_data, signature, qr_matrix) and "files" (file
+        name -> bytes, ready to be written as they are).
+        """
+        prepared = self.prepare()
+        return self.executor.submit(self._issue, prepared, list(disks), dict(wipe_reports))
+
+    def _issue(self, prepared, disks, wipe_reports):
+        try:
+            prepared.result()
+        except Exception:
+            # Surface the real error (e.g. a missing key); the next issue() prepares again
+            if self.prepared is prepared:
+                self.prepared = None
+            raise
+        certificate_datas = [create_certificate_data(disk, wipe_reports.get(disk.get('name'))) for disk in disks]
+        # A multi-disk session is signed once, over a Merkle root
+        if len(certificate_datas) > 1:
+            signatures = self.signer.sign_batch(certificate_datas)
+        else:
+            signatures = self.signer.sign_many(certificate_datas)
+
+        certificates = []
+        files = {}
+        for disk, certificate_data, signature in zip(disks, certificate_datas, signatures):
+            cert_with_sig = dict(certificate_data, signature=signature.hex())
+            qr_matrix = generate_qr_code(certificate_qr_data(cert_with_sig))
+            certificates.append({
+                "disk": disk,
+                "certificate_data": certificate_data,
+                "signature": signature,
+                "qr_matrix": qr_matrix,
+            })
+
+            # Keep the original file names for a single disk
+            suffix = "" if len(disks) == 1 else f"_{disk.get('name')}"
+            pdf = io.BytesIO()
+            generate_pdf_certificate(certificate_data, signature, qr_matrix, pdf)
+            files[f"certificate{suffix}.pdf"] = pdf.getvalue()
+            files[f"certificate{suffix}.json"] = certificate_json(certificate_data, signature).encode("utf-8")
+
+        if len(certificates) > 1:
+            report = io.BytesIO()
+            generate_pdf_report([{
+                "certificate_data": cert["certificate_data"],
+                "signature": cert["signature"],
+                "qr_code": cert["qr_matrix"],
+            } for cert in certificates], report)
+            files["certificate_report.pdf"] = report.getvalue()
+
+        return {"certificates": certificates, "files": files}
+
+def save_artifacts(files, directory):
+    """Writes issued certificate files into `directory`."""
+    for name, data in files.items():
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
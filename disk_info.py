@@ -0,0 +1,62 @@
+import safety_config
+
+class DiskInfo:
+    """Helper class to store disk information and provide formatting."""
+    def __init__(self, disk_data):
+        self.disk_data = disk_data
+    
+    def get_display_text(self):
+        """Generate display text for the disk."""
+        model = self.disk_data.get('model', 'Unknown Device')
+        size = self.disk_data.get('size', 'N/A')
+        name = self.disk_data.get('name', 'N/A')
+        
+        transport_value = self.disk_data.get('tran')
+        if transport_value is None:
+            transport = 'unknown'
+        else:
+            transport = str(transport_value).lower()
+
+        is_removable = self.disk_data.get('rm', False)
+        disk_type = self.disk_data.get('type')
+
+        # Create base text
+        if disk_type == 'loop':
+            base_text = f"Virtual Test Disk - {name} ({size})"
+        elif transport == 'usb':
+            base_text = f"USB Drive - {model} - {name} ({size})"
+        elif is_removable:
+            base_text = f"Removable Drive - {model} - {name} ({size})"
+        else:
+            base_text = f"INTERNAL DRIVE - {model} - {name} ({size})"
+        
+        # Add safety status
+        is_safe, reason = self.is_safe()
+        if is_safe:
+            status = "[SAFE] Ready to Wipe"
+        else:
+            status = f"[BLOCKED] {reason}"
+        
+        return f"{base_text}  —  {status}"
+    
+    def is_safe(self):
+        """Check if disk is safe to wipe."""
+        disk_type = self.disk_data.get('type')
+        is_removable = self.disk_data.get('rm', False)
+        
+        transport_value = self.disk_data.get('tran')
+        if transport_value is None:
+            transport = 'unknown'
+        else:
+            transport = str(transport_value).lower()
+
+        if safety_config.SAFETY_MODE:
+            if transport == 'usb' or is_removable:
+                return True, "Removable"
+            
+            if disk_type == 'loop' and 'loop' in safety_config.WHITELISTED_MODELS:
+                return True, "Test Disk"
+
+            return False, "SYSTEM DRIVE"
+        else:
+            return True, "Safety Mode OFF"
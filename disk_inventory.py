@@ -0,0 +1,252 @@
+import os
+import select
+import socket
+import threading
+import time
+
+# Kernel uevent netlink protocol and multicast group (see netlink(7)).
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+
+# Full rescans catch anything the event stream missed, and replace it
+# entirely where netlink is unavailable.
+RESCAN_INTERVAL = 30.0
+POLL_INTERVAL = 2.0
+
+# udev finishes probing (serial, bus) shortly after the kernel event.
+UDEV_SETTLE_DELAY = 1.0
+
+# Block devices that are never wipe targets.
+IGNORED_PREFIXES = ("ram", "zram", "dm-", "md", "sr", "fd", "nbd")
+
+def format_size(size_bytes):
+    """Formats a byte count the way lsblk does (e.g. "14.9G", "1T")."""
+    size = float(size_bytes)
+    for unit in ("B", "K", "M", "G", "T", "P"):
+        if size < 1024 or unit == "P":
+            break
+        size /= 1024
+    text = f"{size:.1f}".rstrip("0").rstrip(".")
+    return text + ("" if unit == "B" else unit)
+
+def _read(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+def _read_int(path, default=0):
+    try:
+        return int(_read(path, default))
+    except (TypeError, ValueError):
+        return default
+
+def read_udev_properties(device_name, sys_block="/sys/block", udev_data="/run/udev/data"):
+    """Reads the udev database entry (E: lines) for a block device."""
+    dev = _read(os.path.join(sys_block, device_name, "dev"))
+    properties = {}
+    if not dev:
+        return properties
+    try:
+        with open(os.path.join(udev_data, f"b{dev}")) as f:
+            for line in f:
+                if line.startswith("E:") and "=" in line:
+                    key, _, value = line[2:].strip().partition("=")
+                    properties[key] = value
+    except OSError:
+        pass
+    return properties
+
+def detect_transport(device_name, sys_path, udev_properties):
+    """Returns the lsblk-style transport (usb, sata, nvme, ...) or None."""
+    if device_name.startswith("nvme"):
+        return "nvme"
+    if "/usb" in sys_path or udev_properties.get("ID_BUS") == "usb":
+        return "usb"
+    if "/ata" in sys_path or udev_properties.get("ID_BUS") == "ata":
+        return "sata"
+    if "/virtio" in sys_path:
+        return None
+    return udev_properties.get("ID_BUS")
+
+def read_device(device_name, sys_block="/sys/block", udev_data="/run/udev/data"):
+    """Builds an lsblk-compatible device dict from sysfs and the udev database.
+
+    Returns None for devices that are not wipe candidates (partitions,
+    ramdisks, device-mapper, unattached loop devices, ...).
+    """
+    if device_name.startswith(IGNORED_PREFIXES):
+        return None
+    base = os.path.join(sys_block, device_name)
+    if not os.path.isdir(base):
+        return None
+
+    size_bytes = _read_int(os.path.join(base, "size")) * 512
+    is_loop = device_name.startswith("loop")
+    if is_loop and size_bytes == 0:
+        return None
+
+    sys_path = os.path.realpath(base)
+    udev = read_udev_properties(device_name, sys_block, udev_data)
+    queue = os.path.join(base, "queue")
+    model = _read(os.path.join(base, "device", "model")) or udev.get("ID_MODEL", "").replace("_", " ") or None
+    serial = (_read(os.path.join(base, "device", "serial"))
+              or udev.get("ID_SERIAL_SHORT") or udev.get("ID_SCSI_SERIAL") or None)
+
+    return {
+        "name": device_name,
+        "model": model,
+        "serial": serial,
+        "size": format_size(size_bytes),
+        "bytes": size_bytes,
+        "type": "loop" if is_loop else "disk",
+        "rm": _read(os.path.join(base, "removable")) == "1",
+        "tran": None if is_loop else detect_transport(device_name, sys_path, udev),
+        "rota": _read(os.path.join(queue, "rotational")) == "1",
+        "log-sec": _read_int(os.path.join(queue, "logical_block_size"), 512),
+        "phy-sec": _read_int(os.path.join(queue, "physical_block_size"), 512),
+        "disc-gran": _read_int(os.path.join(queue, "discard_granularity")),
+        "disc-max": _read_int(os.path.join(queue, "discard_max_bytes")),
+    }
+
+def parse_uevent(message):
+    """Parses a kernel uevent datagram into a dict of its KEY=value fields."""
+    fields = {}
+    for part in message.split(b"\0")[1:]:
+        key, sep, value = part.partition(b"=")
+        if sep:
+            fields[key.decode(errors="replace")] = value.decode(errors="replace")
+    return fields
+
+class DiskInventory:
+    """Keeps a cached snapshot of block devices, updated in the background.
+
+    A daemon thread listens for kernel hotplug events over netlink and
+    re-reads only the affected device from sysfs; a periodic full rescan
+    backs this up (and replaces it where netlink is unavailable).
+    Subscribers receive callback(event, device) with event "add", "remove"
+    or "change", on the inventory thread. The initial scan also runs on
+    that thread and ends with a "ready" event (device None).
+    """
+    def __init__(self, sys_block="/sys/block", udev_data="/run/udev/data"):
+        self.sys_block = sys_block
+        self.udev_data = udev_data
+        self.devices = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        # Serializes re-reads so the watcher and refresh() never double-report
+        self.update_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.refresh_requested = threading.Event()
+        self.thread = None
+        self.pending_settle = {}  # device name -> time to re-read udev data
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def _notify(self, event, device):
+        for callback in list(self.subscribers):
+            callback(event, device)
+
+    def snapshot(self):
+        """Returns the cached devices, sorted by name."""
+        with self.lock:
+            return [dict(self.devices[name]) for name in sorted(self.devices)]
+
+    def update_device(self, device_name):
+        """Re-reads one device and emits an event if it changed."""
+        with self.update_lock:
+            device = read_device(device_name, self.sys_block, self.udev_data)
+            with self.lock:
+                previous = self.devices.get(device_name)
+                if device is None:
+                    self.devices.pop(device_name, None)
+                else:
+                    self.devices[device_name] = device
+
+            if device is None and previous is not None:
+                self._notify("remove", previous)
+            elif device is not None and previous is None:
+                self._notify("add", device)
+            elif device is not None and device != previous:
+                self._notify("change", device)
+
+    def refresh(self):
+        """Rescans every device in sysfs, emitting events for any differences."""
+        try:
+            names = set(os.listdir(self.sys_block))
+        except OSError:
+            names = set()
+        with self.lock:
+            names |= set(self.devices)
+        for name in sorted(names):
+            self.update_device(name)
+
+    def request_refresh(self):
+        """Asks the inventory thread to rescan soon; returns immediately."""
+        self.refresh_requested.set()
+
+    def start(self):
+        """Starts watching for hotplug events; the initial snapshot is taken on the inventory thread."""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _open_netlink(self):
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+            return sock
+        except (AttributeError, OSError):
+            return None
+
+    def _handle_uevent(self, message):
+        fields = parse_uevent(message)
+        if fields.get("SUBSYSTEM") != "block" or fields.get("DEVTYPE") != "disk":
+            return
+        name = fields.get("DEVNAME") or os.path.basename(fields.get("DEVPATH", ""))
+        if not name:
+            return
+        self.update_device(os.path.basename(name))
+        if fields.get("ACTION") in ("add", "change"):
+            self.pending_settle[os.path.basename(name)] = time.monotonic() + UDEV_SETTLE_DELAY
+
+    def _watch(self):
+        sock = self._open_netlink()
+        interval = RESCAN_INTERVAL if sock is not None else POLL_INTERVAL
+        try:
+            self.refresh()
+            self._notify("ready", None)
+            next_rescan = time.monotonic() + interval
+            while not self.stop_event.is_set():
+                timeout = max(0.0, min([next_rescan] + list(self.pending_settle.values())) - time.monotonic())
+                timeout = min(timeout, 0.5)  # Stay responsive to stop()
+                if sock is not None:
+                    readable, _, _ = select.select([sock], [], [], timeout)
+                    if readable:
+                        self._handle_uevent(sock.recv(65536))
+                else:
+                    self.stop_event.wait(timeout)
+
+                now = time.monotonic()
+                for name, due in list(self.pending_settle.items()):
+                    if due <= now:
+                        del self.pending_settle[name]
+                        self.update_device(name)
+                if now >= next_rescan or self.refresh_requested.is_set():
+                    self.refresh_requested.clear()
+                    self.refresh()
+                    next_rescan = now + interval
+        finally:
+            if sock is not None:
+                sock.close()
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from wipe_engine import WipeTarget, allocate_buffer
+
+# Candidate write sizes and numbers of concurrent writers to try.
+BLOCK_SIZES = [128 * 1024, 512 * 1024, 1024 * 1024, 4 * 1024 * 1024, 8 * 1024 * 1024]
+QUEUE_DEPTHS = [1, 2, 4, 8]
+
+# Trial writes stay inside this region at the start of the device, which
+# the wipe overwrites afterwards anyway.
+SCRATCH_BYTES = 256 * 1024 * 1024
+
+# Each trial stops after this long (or once it has filled the scratch
+# region), so calibrating even a slow USB stick takes seconds.
+TRIAL_SECONDS = 0.5
+
+# Profiles are cached next to the application (or its bundle), on the boot USB.
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+if os.path.isfile(_APP_DIR):
+    _APP_DIR = os.path.dirname(_APP_DIR)
+PROFILE_CACHE_PATH = os.path.join(_APP_DIR, "io_profiles.json")
+
+_cache_lock = threading.Lock()
+
+def measure_rate(target, block_size, queue_depth, scratch_bytes, trial_seconds=TRIAL_SECONDS):
+    """Writes a timed burst with `queue_depth` concurrent writers; returns MB/s."""
+    slots = scratch_bytes // block_size
+    if slots < queue_depth:
+        return 0.0
+
+    written = [0] * queue_depth
+    errors = []
+    deadline = time.monotonic() + trial_seconds
+
+    def writer(index):
+        # Incompressible data, so compressing SSD controllers don't inflate the result
+        buffer = allocate_buffer(block_size)
+        buffer[:] = os.urandom(block_size)
+        slot = index
+        try:
+            with memoryview(buffer) as view:
+                while time.monotonic() < deadline and written[index] < scratch_bytes:
+                    target.write_at(view, (slot % slots) * block_size)
+                    written[index] += block_size
+                    slot += queue_depth
+        except OSError as e:
+            errors.append(e)
+        finally:
+            buffer.close()
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(queue_depth)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Include the cache flush so drives with large write caches aren't favoured
+    target.sync()
+    elapsed = time.monotonic() - start
+
+    if errors:
+        raise errors[0]
+    return sum(written) / elapsed / 1e6 if elapsed > 0 else 0.0
+
+def calibrate(device_path, rotational=False, block_sizes=BLOCK_SIZES, queue_depths=QUEUE_DEPTHS):
+    """Finds the fastest block size and queue depth for a device.
+
+    Rotational drives are only tried with a single writer, since concurrent
+    streams just add seeks.
+    """
+    if rotational:
+        queue_depths = [1]
+
+    best = None
+    trials = []
+    with WipeTarget(device_path) as target:
+        scratch_bytes = min(SCRATCH_BYTES, target.size)
+        for block_size in block_sizes:
+            if block_size > scratch_bytes:
+                continue
+            for queue_depth in queue_depths:
+                rate = measure_rate(target, block_size, queue_depth, scratch_bytes)
+                trials.append((block_size, queue_depth, rate))
+                if best is None or rate > best[2]:
+                    best = (block_size, queue_depth, rate)
+
+    if best is None:
+        raise ValueError(f"{device_path} is too small to calibrate")
+
+    return {
+        "blockSize": best[0],
+        "queueDepth": best[1],
+        "rateMBps": round(best[2], 1),
+        "trials": len(trials),
+        "calibratedAt": datetime.utcnow().isoformat() + "Z",
+    }
+
+def profile_keys(disk_data):
+    """Cache keys for a disk: its own serial first, then its model."""
+    keys = []
+    if disk_data.get('serial'):
+        keys.append(f"serial:{disk_data['serial']}")
+    if disk_data.get('model'):
+        keys.append(f"model:{disk_data['model']}")
+    return keys
+
+def load_profiles(path=PROFILE_CACHE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_profile(disk_data, profile, path=PROFILE_CACHE_PATH):
+    """Stores a profile under every cache key of the disk."""
+    with _cache_lock:
+        profiles = load_profiles(path)
+        for key in profile_keys(disk_data):
+            profiles[key] = profile
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(profiles, f, indent=4)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # Read-only media: calibrate again next time
+
+def get_io_profile(device_path, disk_data, path=PROFILE_CACHE_PATH):
+    """Returns (profile, source) for a device, calibrating on a cache miss.
+
+    `source` is "cached" or "calibrated".
+    """
+    profiles = load_profiles(path)
+    for key in profile_keys(disk_data):
+        if key in profiles:
+            return profiles[key], "cached"
+
+    profile = calibrate(device_path, rotational=bool(disk_data.get('rota')))
+    save_profile(disk_data, profile, path)
+    return profile, "calibrated"
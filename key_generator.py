@@ -1,28 +1,48 @@
+import argparse
 
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
 from cryptography.hazmat.primitives import serialization
 
-def generate_keys():
-    """Generates RSA private and public keys and saves them to PEM files."""
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-    )
+# Ed25519 signs fastest and gives the shortest signatures (and QR codes).
+KEY_ALGORITHMS = ("ed25519", "p256", "rsa")
+DEFAULT_KEY_ALGORITHM = "ed25519"
+
+def generate_private_key(algorithm=DEFAULT_KEY_ALGORITHM):
+    """Generates a private key for one of KEY_ALGORITHMS."""
+    if algorithm == "ed25519":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "p256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "rsa":
+        return rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048,
+        )
+    raise ValueError(f"Unknown key algorithm: {algorithm}")
+
+def generate_keys(algorithm=DEFAULT_KEY_ALGORITHM, private_key_path="private_key.pem", public_key_path="public_key.pem"):
+    """Generates private and public keys and saves them to PEM files."""
+    private_key = generate_private_key(algorithm)
     public_key = private_key.public_key()
 
-    with open("private_key.pem", "wb") as f:
+    with open(private_key_path, "wb") as f:
         f.write(private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PrivateFormat.PKCS8,
             encryption_algorithm=serialization.NoEncryption()
         ))
 
-    with open("public_key.pem", "wb") as f:
+    with open(public_key_path, "wb") as f:
         f.write(public_key.public_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         ))
 
 if __name__ == "__main__":
-    generate_keys()
-    print("Successfully generated private_key.pem and public_key.pem")
+    parser = argparse.ArgumentParser(description="Generate a certificate signing key pair.")
+    parser.add_argument("--algorithm", choices=KEY_ALGORITHMS, default=DEFAULT_KEY_ALGORITHM)
+    parser.add_argument("--private-key", default="private_key.pem")
+    parser.add_argument("--public-key", default="public_key.pem")
+    args = parser.parse_args()
+    generate_keys(args.algorithm, args.private_key, args.public_key)
+    print(f"Successfully generated {args.private_key} and {args.public_key} ({args.algorithm})")
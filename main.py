@@ -1,27 +1,23 @@
 import sys
-import urllib.parse
-import json
-import subprocess
-import re
 import os
+import threading
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QStackedWidget, QWidget, QVBoxLayout, 
     QLabel, QPushButton, QListWidget, QLineEdit, QProgressBar, QFileDialog, 
     QMessageBox, QListWidgetItem, QHBoxLayout, QSizePolicy
 )
-from PyQt5.QtGui import QPixmap, QColor, QIcon
+from PyQt5.QtGui import QImage, QPixmap, QColor, QIcon
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
-from certificate_module import (
-    create_certificate_data,
-    sign_certificate,
-    generate_pdf_certificate,
-    generate_json_certificate,
-    generate_qr_code,
-)
-import safety_config
-from nwipe_handler import build_nwipe_command, run_nwipe
+from certificate_module import register_certificates
+from certificate_pipeline import CertificatePipeline, save_artifacts
+from disk_info import DiskInfo
+from wipe_job import WipeJob
+from wipe_journal import WipeJournal
+from progress_telemetry import format_record
+from wipe_scheduler import WipeScheduler
+from disk_inventory import DiskInventory
 
 # --- Dark Theme Stylesheet ---
 DARK_STYLESHEET = """
@@ -98,110 +94,45 @@ QMessageBox {
 """
 
 class WipeThread(QThread):
-    """Worker thread for the wipe process."""
+    """Worker thread for the wipe process; the work itself is done by WipeJob."""
     progress = pyqtSignal(int)
+    telemetry = pyqtSignal(object)  # ProgressRecord, at most a few per second
     finished = pyqtSignal()
     log_message = pyqtSignal(str)
 
-    def __init__(self, device_path, method, is_dry_run=False):
+    def __init__(self, device_path, method, **options):
         super().__init__()
-        self.device_path = f"/dev/{device_path}"
-        self.method = method
-        self.is_dry_run = is_dry_run
+        self.job = WipeJob(device_path, method, **options)
 
-    def run(self):
-        if self.is_dry_run:
-            command = build_nwipe_command(self.device_path, self.method, self.is_dry_run)
-            self.log_message.emit("*** DRY RUN MODE ***")
-            self.log_message.emit(f"Command: {' '.join(command)}")
-            self.progress.emit(100)
-            self.finished.emit()
-            return
+    @property
+    def report(self):
+        return self.job.report
 
-        # --- REAL WIPE LOGIC ---
-        command = build_nwipe_command(self.device_path, self.method, is_dry_run=False)
-        self.log_message.emit("--- REAL WIPE STARTED ---")
-        self.log_message.emit(f"Command: {' '.join(command)}")
+    def cancel(self):
+        self.job.cancel()
 
-        progress_regex = re.compile(r"(\d+\.\d+)\s*% done")
+    @property
+    def cancelled(self):
+        return self.job.cancelled
 
-        for line in run_nwipe(command):
-            self.log_message.emit(line.strip())  # Log nwipe's raw output
-            match = progress_regex.search(line)
-            if match:
-                percentage = float(match.group(1))
-                self.progress.emit(int(percentage))
-        
-        self.progress.emit(100) # Ensure it finishes at 100%
-        self.log_message.emit("--- REAL WIPE FINISHED ---")
+    def run(self):
+        if self.job.run(log=self.log_message.emit, on_progress=self.publish_progress):
+            self.progress.emit(100) # Ensure it finishes at 100%
         self.finished.emit()
 
-class DiskInfo:
-    """Helper class to store disk information and provide formatting."""
-    def __init__(self, disk_data):
-        self.disk_data = disk_data
-    
-    def get_display_text(self):
-        """Generate display text for the disk."""
-        model = self.disk_data.get('model', 'Unknown Device')
-        size = self.disk_data.get('size', 'N/A')
-        name = self.disk_data.get('name', 'N/A')
-        
-        transport_value = self.disk_data.get('tran')
-        if transport_value is None:
-            transport = 'unknown'
-        else:
-            transport = str(transport_value).lower()
-
-        is_removable = self.disk_data.get('rm', False)
-        disk_type = self.disk_data.get('type')
-
-        # Create base text
-        if disk_type == 'loop':
-            base_text = f"Virtual Test Disk - {name} ({size})"
-        elif transport == 'usb':
-            base_text = f"USB Drive - {model} - {name} ({size})"
-        elif is_removable:
-            base_text = f"Removable Drive - {model} - {name} ({size})"
-        else:
-            base_text = f"INTERNAL DRIVE - {model} - {name} ({size})"
-        
-        # Add safety status
-        is_safe, reason = self.is_safe()
-        if is_safe:
-            status = "[SAFE] Ready to Wipe"
-        else:
-            status = f"[BLOCKED] {reason}"
-        
-        return f"{base_text}  —  {status}"
-    
-    def is_safe(self):
-        """Check if disk is safe to wipe."""
-        disk_type = self.disk_data.get('type')
-        is_removable = self.disk_data.get('rm', False)
-        
-        transport_value = self.disk_data.get('tran')
-        if transport_value is None:
-            transport = 'unknown'
-        else:
-            transport = str(transport_value).lower()
-
-        if safety_config.SAFETY_MODE:
-            if transport == 'usb' or is_removable:
-                return True, "Removable"
-            
-            if disk_type == 'loop' and 'loop' in safety_config.WHITELISTED_MODELS:
-                return True, "Test Disk"
-
-            return False, "SYSTEM DRIVE"
-        else:
-            return True, "Safety Mode OFF"
+    def publish_progress(self, record):
+        self.telemetry.emit(record)
+        self.progress.emit(int(record.percent))
 
 class WelcomeScreen(QWidget):
     """Screen 1: Welcome and Disk Selection."""
+    # Inventory events arrive on the inventory thread; this signal queues them to the GUI thread
+    device_event = pyqtSignal(str, object)
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
+        self.disk_objects = []
         
         # --- Main Vertical Layout ---
         layout = QVBoxLayout(self)
@@ -217,12 +148,13 @@ class WelcomeScreen(QWidget):
         self.disk_list = QListWidget()
         self.disk_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.disk_list.setResizeMode(QListWidget.Adjust)
+        self.disk_list.setSelectionMode(QListWidget.ExtendedSelection)
 
         # --- Bottom Buttons Layout ---
         button_layout = QHBoxLayout()
         refresh_button = QPushButton("Refresh Disk List")
-        refresh_button.clicked.connect(self.populate_disks)
-        self.wipe_button = QPushButton("Wipe Selected Drive")
+        refresh_button.clicked.connect(self.main_window.inventory.request_refresh)
+        self.wipe_button = QPushButton("Wipe Selected Drive(s)")
         self.wipe_button.clicked.connect(self.go_to_confirmation)
         self.wipe_button.setEnabled(False)
         self.wipe_button.setStyleSheet("font-size: 16px; padding: 12px;")
@@ -236,65 +168,74 @@ class WelcomeScreen(QWidget):
         layout.addLayout(button_layout, 0)
 
         self.disk_list.itemSelectionChanged.connect(self.enable_wipe_button)
+        self.device_event.connect(self.on_device_event)
+        self.main_window.inventory.subscribe(self.device_event.emit)
         self.populate_disks()
 
     def populate_disks(self):
-        """Populate the disk list with available drives."""
+        """Populate the disk list from the inventory's cached snapshot."""
         self.disk_list.clear()
         self.disk_objects = []  # Store disk objects for later reference
-        
-        try:
-            result = subprocess.run(
-                ['lsblk', '--json', '-o', 'NAME,MODEL,SIZE,TYPE,RM,TRAN'], 
-                capture_output=True, text=True, check=True
-            )
-            devices = json.loads(result.stdout)['blockdevices']
-            
-            for device in devices:
-                if device.get('type') in ['disk', 'loop']:
-                    disk_info = DiskInfo(device)
-                    self.disk_objects.append(disk_info)
-                    
-                    # Create a simple list item with text
-                    item = QListWidgetItem(disk_info.get_display_text())
-                    
-                    # Color the item based on safety
-                    is_safe, _ = disk_info.is_safe()
-                    if is_safe:
-                        item.setForeground(QColor("#ffffff"))  # White text
-                    else:
-                        item.setForeground(QColor("#ffaaaa"))  # Light red text
-                    
-                    self.disk_list.addItem(item)
-
-        except Exception as e:
-            QMessageBox.critical(self, "Disk Detection Error", f"Could not list disks: {e}")
+        for device in self.main_window.inventory.snapshot():
+            self.add_disk(device)
 
-    def enable_wipe_button(self):
-        """Enable wipe button only if a safe disk is selected."""
-        current_row = self.disk_list.currentRow()
-        if current_row < 0 or current_row >= len(self.disk_objects):
-            self.wipe_button.setEnabled(False)
+    def style_item(self, item, disk_info):
+        item.setText(disk_info.get_display_text())
+        # Color the item based on safety
+        is_safe, _ = disk_info.is_safe()
+        if is_safe:
+            item.setForeground(QColor("#ffffff"))  # White text
+        else:
+            item.setForeground(QColor("#ffaaaa"))  # Light red text
+
+    def add_disk(self, device):
+        disk_info = DiskInfo(device)
+        self.disk_objects.append(disk_info)
+        item = QListWidgetItem()
+        self.style_item(item, disk_info)
+        self.disk_list.addItem(item)
+
+    def on_device_event(self, event, device):
+        """Apply a single add/remove/change event from the inventory to the list."""
+        if event == "ready":
+            # The initial scan is done; interrupted wipes can now be matched to disks
+            self.main_window.offer_resume()
             return
+        names = [d.disk_data.get('name') for d in self.disk_objects]
+        row = names.index(device['name']) if device['name'] in names else -1
+        if event == "add" and row < 0:
+            self.add_disk(device)
+        elif event == "remove" and row >= 0:
+            del self.disk_objects[row]
+            self.disk_list.takeItem(row)
+        elif event == "change" and row >= 0:
+            self.disk_objects[row] = DiskInfo(device)
+            self.style_item(self.disk_list.item(row), self.disk_objects[row])
+        self.enable_wipe_button()
+
+    def selected_disk_infos(self):
+        """Return the DiskInfo objects for all selected rows, in list order."""
+        rows = sorted(index.row() for index in self.disk_list.selectedIndexes())
+        return [self.disk_objects[row] for row in rows if 0 <= row < len(self.disk_objects)]
 
-        disk_info = self.disk_objects[current_row]
-        is_safe, _ = disk_info.is_safe()
-        self.wipe_button.setEnabled(is_safe)
+    def enable_wipe_button(self):
+        """Enable wipe button only if every selected disk is safe."""
+        selected = self.selected_disk_infos()
+        self.wipe_button.setEnabled(bool(selected) and all(d.is_safe()[0] for d in selected))
 
     def go_to_confirmation(self):
         """Navigate to confirmation screen after final warning."""
-        current_row = self.disk_list.currentRow()
-        if current_row < 0 or current_row >= len(self.disk_objects):
+        selected = self.selected_disk_infos()
+        if not selected:
             return
-            
-        disk_info = self.disk_objects[current_row]
-        
+
+        disk_lines = "\n".join(d.get_display_text() for d in selected)
         reply = QMessageBox.warning(self, "Final Confirmation", 
-            f"You are about to permanently erase:\n\n{disk_info.get_display_text()}\n\nThis action cannot be undone.",
+            f"You are about to permanently erase {len(selected)} drive(s):\n\n{disk_lines}\n\nThis action cannot be undone.",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
         if reply == QMessageBox.Yes:
-            self.main_window.set_selected_disk(disk_info.disk_data)
+            self.main_window.set_selected_disks([d.disk_data for d in selected])
             self.main_window.stack.setCurrentIndex(1)
 
 class ConfirmationScreen(QWidget):
@@ -352,6 +293,13 @@ class ProgressScreen(QWidget):
 
         self.progress_bar = QProgressBar()
         layout.addWidget(self.progress_bar)
+
+        # One row per disk, rebuilt for every wipe session
+        self.disk_rows_layout = QVBoxLayout()
+        layout.addLayout(self.disk_rows_layout)
+        self.disk_rows = []
+        self.disk_bars = {}
+        self.wipe_threads = {}
         
         self.cancel_button = QPushButton("Cancel Wipe")
         self.cancel_button.clicked.connect(self.cancel_wipe)
@@ -359,23 +307,99 @@ class ProgressScreen(QWidget):
 
         self.setLayout(layout)
 
-    def start_wipe(self, device_path):
-        self.wipe_thread = WipeThread(device_path, method="dodshort", is_dry_run=False)
-        self.wipe_thread.progress.connect(self.progress_bar.setValue)
-        self.wipe_thread.log_message.connect(lambda msg: print(msg))
-        self.wipe_thread.finished.connect(self.go_to_completion)
-        self.wipe_thread.start()
+    def start_wipe(self, disks, engine="purge", fallback_engine="native", resume_jobs=None):
+        """Wipe all given disks in parallel, limited per controller by WipeScheduler.
+
+        Drives without a usable firmware purge are overwritten by the native
+        engine (calibrated, striped, journaled). `resume_jobs` maps disk
+        names to unfinished journal jobs to continue.
+        """
+        self.resume_jobs = resume_jobs or {}
+        self.cancelling = False
+        self.cancel_button.setEnabled(True)
+        for row in self.disk_rows:
+            row.deleteLater()
+        self.disk_rows = []
+        self.disk_bars = {}
+        self.wipe_threads = {}
+        self.progress_bar.setValue(0)
+
+        for disk in disks:
+            row = QWidget()
+            row_layout = QHBoxLayout(row)
+            row_layout.setContentsMargins(0, 0, 0, 0)
+            row_layout.addWidget(QLabel(f"{disk.get('name')} ({disk.get('size', 'N/A')})"))
+            bar = QProgressBar()
+            row_layout.addWidget(bar, 1)
+            self.disk_rows_layout.addWidget(row)
+            self.disk_rows.append(row)
+            self.disk_bars[disk.get('name')] = bar
+
+        self.status_label.setText(f"Wiping {len(disks)} drive(s)...")
+        self.scheduler = WipeScheduler(disks, start_job=lambda disk: self.start_disk_wipe(disk, engine, fallback_engine))
+        self.scheduler.start()
+
+    def start_disk_wipe(self, disk, engine, fallback_engine):
+        name = disk.get('name')
+        resume_job = self.resume_jobs.get(name)
+        wipe_thread = WipeThread(name, method="dodshort", is_dry_run=False,
+                                 engine="native" if resume_job else engine, fallback_engine=fallback_engine,
+                                 disk_data=disk,
+                                 journal=self.main_window.journal, resume_job=resume_job)
+        wipe_thread.progress.connect(lambda value, name=name: self.update_disk_progress(name, value))
+        wipe_thread.telemetry.connect(lambda record, name=name: self.on_disk_telemetry(name, record))
+        wipe_thread.log_message.connect(lambda msg, name=name: print(f"[{name}] {msg}"))
+        wipe_thread.finished.connect(lambda name=name: self.on_disk_finished(name))
+        self.wipe_threads[name] = wipe_thread
+        wipe_thread.start()
+
+    def on_disk_telemetry(self, name, record):
+        self.disk_bars[name].setFormat(format_record(record))
+        # Get the certificate pipeline ready while the last pass runs
+        if record.pass_count and record.current_pass and record.current_pass >= record.pass_count:
+            self.main_window.certificate_pipeline.prepare()
+
+    def update_disk_progress(self, name, value):
+        self.disk_bars[name].setValue(value)
+        total = sum(bar.value() for bar in self.disk_bars.values())
+        self.progress_bar.setValue(total // max(len(self.disk_bars), 1))
+
+    def on_disk_finished(self, name):
+        self.update_disk_progress(name, 100)
+        if not self.cancelling:
+            self.main_window.certificate_pipeline.prepare()
+        self.scheduler.job_finished(name)
+        if self.scheduler.is_done():
+            if self.cancelling:
+                self.main_window.stack.setCurrentIndex(0)
+            else:
+                self.go_to_completion()
 
     def cancel_wipe(self):
-        if hasattr(self, 'wipe_thread') and self.wipe_thread.isRunning():
-            self.wipe_thread.terminate()
-            self.main_window.stack.setCurrentIndex(0)
+        """Ask every running wipe to stop at its next checkpoint; native wipes can be resumed later."""
+        running = [t for t in self.wipe_threads.values() if t.isRunning()]
+        if running:
+            self.cancelling = True
+            self.scheduler.cancel_pending()
+            self.cancel_button.setEnabled(False)
+            self.status_label.setText("Stopping at the next checkpoint...")
+            for wipe_thread in running:
+                wipe_thread.cancel()
 
     def go_to_completion(self):
         self.main_window.stack.setCurrentIndex(3)
 
+def qr_image(matrix):
+    """Builds a QImage with one pixel per QR module, straight from the matrix."""
+    size = len(matrix)
+    pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+    # copy() so the image owns its pixels once `pixels` goes away
+    return QImage(pixels, size, size, size, QImage.Format_Grayscale8).copy()
+
 class CompletionScreen(QWidget):
     """Screen 4: Completion and Certificate."""
+    certificates_ready = pyqtSignal(object)
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
@@ -387,27 +411,70 @@ class CompletionScreen(QWidget):
         self.status_label.setStyleSheet("font-size: 24px; font-weight: bold; color: #2ecc71; margin-bottom: 10px;")
         layout.addWidget(self.status_label)
 
+        # One entry per wiped disk; selecting it shows that disk's QR code
+        self.certificate_list = QListWidget()
+        self.certificate_list.setMaximumHeight(100)
+        self.certificate_list.currentRowChanged.connect(self.show_qr_code)
+        layout.addWidget(self.certificate_list)
+
         self.qr_label = QLabel()
         self.qr_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.qr_label)
+        self.certificates = []
+        self.files = {}
+        self.certificates_ready.connect(self.show_certificates)
 
-        save_button = QPushButton("Save Certificate to USB")
-        save_button.clicked.connect(self.save_certificate)
-        layout.addWidget(save_button)
+        self.save_button = QPushButton("Save Certificate to USB")
+        self.save_button.clicked.connect(self.save_certificate)
+        layout.addWidget(self.save_button)
 
         self.setLayout(layout)
 
     def generate_certificate(self):
-        self.certificate_data = create_certificate_data(self.main_window.selected_disk)
-        self.signature = sign_certificate(self.certificate_data, "private_key.pem")
-        cert_with_sig = self.certificate_data.copy()
-        cert_with_sig["signature"] = self.signature.hex()
-        full_cert_json = json.dumps(cert_with_sig)
-        encoded_cert = urllib.parse.quote(full_cert_json)
-        verification_url = f"https://sdwv-verifier.com/verify?cert={encoded_cert}"
-        generate_qr_code(verification_url, "certificate_qr.png")
-        pixmap = QPixmap("certificate_qr.png")
-        scaled_pixmap = pixmap.scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        """Hand the session to the certificate pipeline; the results arrive via certificates_ready."""
+        self.certificates = []
+        self.files = {}
+        self.certificate_list.clear()
+        self.qr_label.setText("Preparing certificates...")
+        self.save_button.setEnabled(False)
+        wipe_reports = {name: wipe_thread.report
+                        for name, wipe_thread in self.main_window.progress_screen.wipe_threads.items()}
+        future = self.main_window.certificate_pipeline.issue(self.main_window.selected_disks, wipe_reports)
+        # Called on the pipeline thread; the signal delivers it to the GUI thread
+        future.add_done_callback(self.certificates_ready.emit)
+
+    def show_certificates(self, future):
+        try:
+            issued = future.result()
+        except Exception as e:
+            self.qr_label.setText(f"Certificate generation failed: {e}")
+            return
+        self.certificates = issued["certificates"]
+        self.files = issued["files"]
+        for cert in self.certificates:
+            disk = cert["disk"]
+            self.certificate_list.addItem(f"{disk.get('name')} - {disk.get('model') or 'Unknown Device'} ({disk.get('size', 'N/A')})")
+        self.certificate_list.setCurrentRow(0)
+        self.save_button.setEnabled(True)
+
+        # The QR links resolve once the service has the certificates; the
+        # saved certificate.json files can always be uploaded instead.
+        signed_certificates = [dict(cert["certificate_data"], signature=cert["signature"].hex()) for cert in self.certificates]
+        threading.Thread(target=self.register_certificates, args=(signed_certificates,), daemon=True).start()
+
+    def register_certificates(self, signed_certificates):
+        try:
+            result = register_certificates(signed_certificates)
+            print(f"Registered {result.get('accepted', 0)} certificate(s) with the verification service")
+        except (OSError, ValueError) as e:
+            print(f"Could not register certificates with the verification service: {e}")
+
+    def show_qr_code(self, row):
+        if row < 0 or row >= len(self.certificates):
+            return
+        pixmap = QPixmap.fromImage(qr_image(self.certificates[row]["qr_matrix"]))
+        # Nearest-neighbour scaling keeps the modules crisp
+        scaled_pixmap = pixmap.scaled(300, 300, Qt.KeepAspectRatio, Qt.FastTransformation)
         self.qr_label.setPixmap(scaled_pixmap)
 
     def save_certificate(self):
@@ -415,10 +482,9 @@ class CompletionScreen(QWidget):
         options |= QFileDialog.DontUseNativeDialog
         directory = QFileDialog.getExistingDirectory(self, "Select USB Drive", options=options)
         if directory:
-            qr_path = "certificate_qr.png"
-            generate_pdf_certificate(self.certificate_data, self.signature, qr_path, os.path.join(directory, "certificate.pdf"))
-            generate_json_certificate(self.certificate_data, self.signature, os.path.join(directory, "certificate.json"))
-            QMessageBox.information(self, "Success", f"Certificate saved to {directory}")
+            # Everything was rendered by the pipeline; only the files are written here
+            save_artifacts(self.files, directory)
+            QMessageBox.information(self, "Success", f"{len(self.certificates)} certificate(s) saved to {directory}")
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -429,6 +495,13 @@ class MainWindow(QMainWindow):
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
 
+        # Background disk inventory shared by all screens; started once they subscribe
+        self.inventory = DiskInventory()
+        self.journal = WipeJournal()
+        # Loads the signing key once, in the background, and issues certificates off the GUI thread
+        self.certificate_pipeline = CertificatePipeline("private_key.pem")
+        self.resume_jobs = {}
+
         self.welcome_screen = WelcomeScreen(self)
         self.confirmation_screen = ConfirmationScreen(self)
         self.progress_screen = ProgressScreen(self)
@@ -440,18 +513,50 @@ class MainWindow(QMainWindow):
         self.stack.addWidget(self.completion_screen)
 
         self.stack.currentChanged.connect(self.on_screen_change)
+        # The first scan runs on the inventory thread; its "ready" event triggers offer_resume()
+        self.inventory.start()
+
+    def offer_resume(self):
+        """Offer to resume wipes the journal shows were interrupted.
+
+        Accepted resumes still go through the ERASE confirmation screen.
+        """
+        disks = []
+        for job in self.journal.pending_jobs():
+            # Without a serial number the disk cannot be identified safely
+            if not job.get('serial'):
+                continue
+            disk = next((d for d in self.inventory.snapshot()
+                         if d.get('serial') == job['serial'] and d.get('bytes') == job.get('size')), None)
+            if disk is None or not DiskInfo(disk).is_safe()[0]:
+                continue
+            percent = (job['pass'] + job['offset'] / max(job['size'], 1)) * 100.0 / len(job['passes'])
+            reply = QMessageBox.question(self, "Resume Interrupted Wipe",
+                f"A wipe of {DiskInfo(disk).get_display_text()} was interrupted at {percent:.1f}%.\n\nResume it from the last checkpoint?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if reply == QMessageBox.Yes:
+                disks.append(disk)
+                self.resume_jobs[disk['name']] = job
+            else:
+                self.journal.abandon(job['job'])
+        if disks:
+            self.set_selected_disks(disks)
+            self.stack.setCurrentIndex(1)
 
     def set_selected_disk(self, disk):
-        self.selected_disk = disk
+        self.set_selected_disks([disk])
+
+    def set_selected_disks(self, disks):
+        self.selected_disks = list(disks)
 
     def on_screen_change(self, index):
         if index == 2:
-            device_name = self.selected_disk.get('name')
-            self.progress_screen.start_wipe(device_name)
+            self.progress_screen.start_wipe(self.selected_disks, resume_jobs=self.resume_jobs)
+            self.resume_jobs = {}
         elif index == 3:
             self.completion_screen.generate_certificate()
 
-if __name__ == "__main__":
+def main():
     app = QApplication(sys.argv)
     app.setStyleSheet(DARK_STYLESHEET)
     
@@ -461,4 +566,7 @@ if __name__ == "__main__":
 
     main_win = MainWindow()
     main_win.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -9,6 +9,11 @@ WIPE_METHODS = {
     "Random Data": "random",
 }
 
+def describe_wipe_method(method, engine="nwipe"):
+    """Returns the certificate label for an overwrite method and engine."""
+    names = {value: name for name, value in WIPE_METHODS.items()}
+    return f"NIST SP 800-88 Clear ({names.get(method, method)} overwrite, {engine})"
+
 def build_nwipe_command(device_path, method="dodshort", is_dry_run=True):
     """Constructs the nwipe command as a list of arguments."""
     command = [
@@ -28,8 +33,11 @@ def build_nwipe_command(device_path, method="dodshort", is_dry_run=True):
 
     return command
 
-def run_nwipe(command):
-    """Runs the nwipe command and yields its output line by line."""
+def run_nwipe(command, stop_event=None):
+    """Runs the nwipe command and yields its output line by line.
+
+    If `stop_event` is set, nwipe is terminated after its next output line.
+    """
     try:
         process = subprocess.Popen(
             command,
@@ -42,6 +50,11 @@ def run_nwipe(command):
 
         for line in process.stdout:
             yield line
+            if stop_event is not None and stop_event.is_set():
+                process.terminate()
+                process.wait()
+                yield "nwipe stopped by user."
+                return
 
         process.wait()
         if process.returncode != 0:
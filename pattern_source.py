@@ -0,0 +1,97 @@
+import os
+import queue
+import threading
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from wipe_engine import allocate_buffer
+
+# Number of pre-allocated buffers kept filled ahead of the writer.
+DEFAULT_RING_SIZE = 8
+DEFAULT_WORKERS = 2
+
+AES_BLOCK_SIZE = 16
+
+class RandomPatternSource:
+    """Cryptographically strong random data for random wipe passes.
+
+    The stream is an AES-256-CTR keystream under a fresh random key. Block N
+    of the pass starts at counter N * block_size / 16, so worker threads can
+    generate blocks independently and out of order while the writer still
+    receives them in sequence.
+
+    Workers fill a fixed ring of page-aligned buffers allocated up front.
+    Call get() for the next block and release() once it has been written;
+    the buffer then goes back to the workers for refilling.
+    """
+    def __init__(self, block_size, total_size, ring_size=DEFAULT_RING_SIZE, workers=DEFAULT_WORKERS, key=None):
+        if block_size % AES_BLOCK_SIZE:
+            raise ValueError(f"Block size must be a multiple of {AES_BLOCK_SIZE}")
+        self.block_size = block_size
+        self.block_count = -(-total_size // block_size)
+        self.key = key or os.urandom(32)
+        self.initial_counter = int.from_bytes(os.urandom(AES_BLOCK_SIZE), "big")
+
+        self.buffers = [allocate_buffer(block_size) for _ in range(min(ring_size, max(self.block_count, 1)))]
+        self.free = queue.Queue()
+        for buffer in self.buffers:
+            self.free.put(buffer)
+        self.ready = {}
+        self.ready_condition = threading.Condition()
+        self.next_index = 0
+        self.next_read = 0
+        self.closed = False
+        self.zeros = bytes(block_size)
+
+        self.workers = [threading.Thread(target=self._fill, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def _counter_block(self, index):
+        counter = (self.initial_counter + index * (self.block_size // AES_BLOCK_SIZE)) % (1 << 128)
+        return counter.to_bytes(AES_BLOCK_SIZE, "big")
+
+    def _fill(self):
+        cipher = algorithms.AES(self.key)
+        while True:
+            buffer = self.free.get()
+            with self.ready_condition:
+                # The index is claimed only once a buffer is in hand, so the
+                # block the writer is waiting for can never be starved.
+                if self.closed or self.next_index >= self.block_count:
+                    self.free.put(buffer)
+                    return
+                index = self.next_index
+                self.next_index += 1
+
+            encryptor = Cipher(cipher, modes.CTR(self._counter_block(index))).encryptor()
+            encryptor.update_into(self.zeros, buffer)
+
+            with self.ready_condition:
+                self.ready[index] = buffer
+                self.ready_condition.notify_all()
+
+    def get(self):
+        """Returns the buffer holding the next block of the stream."""
+        with self.ready_condition:
+            while self.next_read not in self.ready:
+                self.ready_condition.wait()
+            buffer = self.ready.pop(self.next_read)
+            self.next_read += 1
+        return buffer
+
+    def release(self, buffer):
+        """Hands a written buffer back to the workers."""
+        self.free.put(buffer)
+
+    def close(self):
+        """Stops the workers and frees the ring."""
+        with self.ready_condition:
+            self.closed = True
+        for _ in self.workers:
+            self.free.put(None)
+        for worker in self.workers:
+            worker.join()
+        for buffer in self.buffers:
+            buffer.close()
+        self.buffers = []
@@ -0,0 +1,200 @@
+import re
+import threading
+import time
+from collections import namedtuple
+
+# Default publish rate. Output is parsed as fast as it arrives, but
+# subscribers see at most this many updates per second.
+DEFAULT_RATE_HZ = 5.0
+
+# Weight of the newest sample in the smoothed throughput.
+THROUGHPUT_SMOOTHING = 0.3
+
+ProgressRecord = namedtuple("ProgressRecord", [
+    "device",
+    "percent",
+    "bytes_done",
+    "total_bytes",
+    "current_pass",
+    "pass_count",
+    "mb_per_s",
+    "eta_seconds",
+    "error_count",
+    "elapsed_seconds",
+    "finished",
+])
+
+PERCENT_REGEX = re.compile(r"(\d+(?:\.\d+)?)\s*% done")
+PASS_REGEX = re.compile(r"\bpass (\d+)\s*/\s*(\d+)", re.IGNORECASE)
+HEADER_REGEX = re.compile(r"(\d+) bytes, (\d+) passes")
+THROUGHPUT_REGEX = re.compile(r"(\d+(?:\.\d+)?)\s*MB/s")
+
+class ProgressParser:
+    """Turns wipe engine output (nwipe, native engine, purge) into progress state."""
+    def __init__(self, device_size=None):
+        self.device_size = device_size
+        self.percent = 0.0
+        self.current_pass = None
+        self.pass_count = None
+        self.reported_mb_per_s = None
+        self.error_count = 0
+
+    def feed(self, line):
+        """Parses one output line. Returns True if it only carried progress."""
+        if line.startswith("ERROR:"):
+            self.error_count += 1
+            return False
+
+        header = HEADER_REGEX.search(line)
+        if header:
+            self.device_size = int(header.group(1))
+            self.pass_count = int(header.group(2))
+
+        pass_match = PASS_REGEX.search(line)
+        if pass_match:
+            self.current_pass = int(pass_match.group(1))
+            self.pass_count = int(pass_match.group(2))
+
+        throughput = THROUGHPUT_REGEX.search(line)
+        if throughput:
+            self.reported_mb_per_s = float(throughput.group(1))
+
+        percent = PERCENT_REGEX.search(line)
+        if percent:
+            self.percent = min(float(percent.group(1)), 100.0)
+            return not (header or pass_match)
+        return False
+
+    @property
+    def total_bytes(self):
+        if self.device_size is None:
+            return None
+        return self.device_size * (self.pass_count or 1)
+
+class ProgressMonitor:
+    """Parses wipe output off the caller's thread and publishes throttled records.
+
+    run() consumes the engine's output generator on a reader thread, so a
+    slow subscriber never stalls the engine, and publishes a ProgressRecord
+    to every subscriber at most `rate_hz` times per second, and only when
+    something changed. Lines that are not plain progress updates (errors,
+    pass changes, headers) are forwarded to the `on_line` callback.
+    """
+    def __init__(self, device, device_size=None, rate_hz=DEFAULT_RATE_HZ, on_line=None):
+        self.device = device
+        self.parser = ProgressParser(device_size)
+        self.interval = 1.0 / rate_hz
+        self.on_line = on_line
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.start_time = None
+        self.last_sample = None  # (time, bytes_done, percent)
+        self.mb_per_s = None
+        self.percent_per_s = None
+        self.last_published = None
+        self.latest = None
+
+    def subscribe(self, callback):
+        """Registers callback(record); it runs on the thread that called run()."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def _read(self, lines):
+        for line in lines:
+            line = line.rstrip("\n")
+            with self.lock:
+                progress_only = self.parser.feed(line)
+            if not progress_only and self.on_line is not None:
+                self.on_line(line)
+
+    def snapshot(self, finished=False):
+        """Builds a record from the current state and updates the rate estimates."""
+        now = time.monotonic()
+        with self.lock:
+            parser = self.parser
+            percent = 100.0 if finished and parser.error_count == 0 else parser.percent
+            total_bytes = parser.total_bytes
+            current_pass = parser.current_pass
+            pass_count = parser.pass_count
+            reported_mb_per_s = parser.reported_mb_per_s
+            error_count = parser.error_count
+
+        bytes_done = int(total_bytes * percent / 100.0) if total_bytes else None
+        if self.last_sample is not None:
+            last_time, last_bytes, last_percent = self.last_sample
+            elapsed = now - last_time
+            if elapsed > 0:
+                percent_rate = (percent - last_percent) / elapsed
+                self.percent_per_s = self._smooth(self.percent_per_s, percent_rate)
+                if bytes_done is not None:
+                    rate = (bytes_done - last_bytes) / elapsed / 1e6
+                    self.mb_per_s = self._smooth(self.mb_per_s, rate)
+        self.last_sample = (now, bytes_done or 0, percent)
+
+        eta_seconds = None
+        if self.percent_per_s and self.percent_per_s > 0:
+            eta_seconds = (100.0 - percent) / self.percent_per_s
+        mb_per_s = reported_mb_per_s if reported_mb_per_s is not None else self.mb_per_s
+
+        return ProgressRecord(
+            device=self.device,
+            percent=percent,
+            bytes_done=bytes_done,
+            total_bytes=total_bytes,
+            current_pass=current_pass,
+            pass_count=pass_count,
+            mb_per_s=round(mb_per_s, 1) if mb_per_s is not None else None,
+            eta_seconds=round(eta_seconds) if eta_seconds is not None else None,
+            error_count=error_count,
+            elapsed_seconds=round(now - self.start_time, 1),
+            finished=finished,
+        )
+
+    @staticmethod
+    def _smooth(previous, sample):
+        if previous is None:
+            return sample
+        return previous + THROUGHPUT_SMOOTHING * (sample - previous)
+
+    def _publish(self, finished=False):
+        record = self.snapshot(finished)
+        self.latest = record
+        # Skip publishing when nothing a front end would display has changed
+        key = (round(record.percent, 1), record.current_pass, record.error_count, record.finished)
+        if key == self.last_published:
+            return
+        self.last_published = key
+        for callback in list(self.subscribers):
+            callback(record)
+
+    def run(self, lines):
+        """Consumes output lines until exhausted, publishing records. Returns the final record."""
+        self.start_time = time.monotonic()
+        reader = threading.Thread(target=self._read, args=(lines,), daemon=True)
+        reader.start()
+        while reader.is_alive():
+            reader.join(self.interval)
+            self._publish()
+        self._publish(finished=True)
+        return self.latest
+
+def format_eta(seconds):
+    """Formats seconds as H:MM:SS."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+def format_record(record):
+    """Returns a one-line human readable summary of a ProgressRecord."""
+    parts = [f"{record.percent:.1f}%"]
+    if record.current_pass is not None and record.pass_count:
+        parts.append(f"pass {record.current_pass}/{record.pass_count}")
+    if record.mb_per_s is not None:
+        parts.append(f"{record.mb_per_s:.1f} MB/s")
+    if record.eta_seconds is not None and not record.finished:
+        parts.append(f"ETA {format_eta(record.eta_seconds)}")
+    if record.error_count:
+        parts.append(f"{record.error_count} error(s)")
+    return " | ".join(parts)
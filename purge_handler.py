@@ -0,0 +1,271 @@
+import json
+import os
+import subprocess
+import time
+
+# Firmware purge methods, fastest first. Every entry is a NIST SP 800-88 Purge
+# technique for its interface; plain discard (TRIM) is probed and reported but
+# never used on its own because it does not guarantee the data is unreadable.
+PURGE_METHODS = {
+    "nvme-sanitize-crypto": "NIST SP 800-88 Purge (NVMe Sanitize, Crypto Erase)",
+    "nvme-sanitize-block": "NIST SP 800-88 Purge (NVMe Sanitize, Block Erase)",
+    "nvme-format-crypto": "NIST SP 800-88 Purge (NVMe Format, Cryptographic Erase)",
+    "nvme-format-user-data": "NIST SP 800-88 Purge (NVMe Format, User Data Erase)",
+    "ata-secure-erase-enhanced": "NIST SP 800-88 Purge (ATA Enhanced Secure Erase)",
+    "ata-secure-erase": "NIST SP 800-88 Purge (ATA Secure Erase)",
+}
+
+# Temporary password required by the ATA security feature set. It is cleared
+# by the drive once SECURITY ERASE UNIT completes.
+ATA_ERASE_PASSWORD = "SDWV"
+
+# How often to poll an in-progress NVMe sanitize.
+SANITIZE_POLL_SECONDS = 2
+
+# Polls allowed before a sanitize shows up as started in the log, and the
+# overall time limit for one to finish. Hitting either is an error, so the
+# wipe falls back to overwriting instead of waiting forever.
+SANITIZE_START_POLLS = 30
+SANITIZE_TIMEOUT_SECONDS = 24 * 3600
+
+# sanitize-log SSTAT status values
+SANITIZE_NEVER = 0
+SANITIZE_COMPLETED = 1
+SANITIZE_FAILED = 3
+SANITIZE_COMPLETED_NO_DEALLOCATE = 4
+
+class CommandRunner:
+    """Runs the external tools (nvme, hdparm, blkdiscard) used for purging.
+
+    `bin_dir` is searched before PATH, so tests can point it at stub
+    binaries. Subclass and override run()/stream() to replace the layer
+    entirely.
+    """
+    def __init__(self, bin_dir=None):
+        self.env = None
+        if bin_dir:
+            self.env = dict(os.environ)
+            self.env["PATH"] = bin_dir + os.pathsep + self.env.get("PATH", "")
+
+    def run(self, command):
+        """Runs a command and returns the CompletedProcess (text output)."""
+        return subprocess.run(command, capture_output=True, text=True, env=self.env)
+
+    def stream(self, command):
+        """Runs a command and yields its output line by line, like run_nwipe."""
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=self.env,
+        )
+        for line in process.stdout:
+            yield line
+        process.wait()
+        if process.returncode != 0:
+            yield f"ERROR: {command[0]} exited with code {process.returncode}"
+
+def _read_sysfs_int(path):
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 0
+
+def probe_discard(device_name, sys_block="/sys/block"):
+    """Reads the discard limits of a block device from sysfs."""
+    queue = os.path.join(sys_block, device_name, "queue")
+    granularity = _read_sysfs_int(os.path.join(queue, "discard_granularity"))
+    max_bytes = _read_sysfs_int(os.path.join(queue, "discard_max_bytes"))
+    return {
+        "supported": max_bytes > 0,
+        "granularity": granularity,
+        "maxBytes": max_bytes,
+    }
+
+def probe_nvme(device_path, runner):
+    """Reads sanitize and format capabilities from `nvme id-ctrl`."""
+    try:
+        result = runner.run(["nvme", "id-ctrl", device_path, "--output-format=json"])
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        id_ctrl = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+    sanicap = int(id_ctrl.get("sanicap", 0))
+    fna = int(id_ctrl.get("fna", 0))
+    oacs = int(id_ctrl.get("oacs", 0))
+    format_supported = bool(oacs & 0x2)
+    return {
+        "sanitizeCrypto": bool(sanicap & 0x1),
+        "sanitizeBlock": bool(sanicap & 0x2),
+        "sanitizeOverwrite": bool(sanicap & 0x4),
+        "formatUserData": format_supported,
+        "formatCrypto": format_supported and bool(fna & 0x4),
+    }
+
+def parse_hdparm_security(output):
+    """Parses the "Security:" section of `hdparm -I` output."""
+    security = {"supported": False, "enabled": False, "frozen": False, "enhanced": False}
+    in_section = False
+    for raw_line in output.splitlines():
+        line = " ".join(raw_line.split())
+        if raw_line.startswith("Security:"):
+            in_section = True
+            continue
+        if not in_section:
+            continue
+        if raw_line and not raw_line[0].isspace():
+            break  # Next top-level section
+
+        negated = line.startswith("not ")
+        word = line[4:] if negated else line
+        if word == "supported":
+            security["supported"] = not negated
+        elif word == "enabled":
+            security["enabled"] = not negated
+        elif word == "frozen":
+            security["frozen"] = not negated
+        elif word == "supported: enhanced erase":
+            security["enhanced"] = not negated
+    return security
+
+def probe_ata(device_path, runner):
+    """Reads the ATA security feature set from `hdparm -I`."""
+    try:
+        result = runner.run(["hdparm", "-I", device_path])
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0 or "Security:" not in result.stdout:
+        return None
+    return parse_hdparm_security(result.stdout)
+
+def probe_capabilities(device_path, runner=None, sys_block="/sys/block"):
+    """Probes which firmware erase methods the device supports."""
+    runner = runner or CommandRunner()
+    device_name = os.path.basename(device_path)
+    capabilities = {
+        "discard": probe_discard(device_name, sys_block),
+        "nvme": None,
+        "ata": None,
+    }
+    if device_name.startswith("nvme"):
+        capabilities["nvme"] = probe_nvme(device_path, runner)
+    elif not device_name.startswith("loop"):
+        capabilities["ata"] = probe_ata(device_path, runner)
+    return capabilities
+
+def select_purge_method(capabilities):
+    """Returns the fastest NIST 800-88 purge method available, or None."""
+    nvme = capabilities.get("nvme") or {}
+    ata = capabilities.get("ata") or {}
+    ata_usable = ata.get("supported") and not ata.get("frozen") and not ata.get("enabled")
+
+    available = {
+        "nvme-sanitize-crypto": nvme.get("sanitizeCrypto"),
+        "nvme-sanitize-block": nvme.get("sanitizeBlock"),
+        "nvme-format-crypto": nvme.get("formatCrypto"),
+        "nvme-format-user-data": nvme.get("formatUserData"),
+        "ata-secure-erase-enhanced": ata_usable and ata.get("enhanced"),
+        "ata-secure-erase": ata_usable,
+    }
+    for method in PURGE_METHODS:
+        if available.get(method):
+            return method
+    return None
+
+def build_purge_commands(device_path, method):
+    """Constructs the command(s) for a purge method as lists of arguments."""
+    if method == "nvme-sanitize-crypto":
+        return [["nvme", "sanitize", device_path, "--sanact=4"]]
+    if method == "nvme-sanitize-block":
+        return [["nvme", "sanitize", device_path, "--sanact=2"]]
+    if method == "nvme-format-crypto":
+        return [["nvme", "format", device_path, "--ses=2", "--force"]]
+    if method == "nvme-format-user-data":
+        return [["nvme", "format", device_path, "--ses=1", "--force"]]
+    if method in ("ata-secure-erase-enhanced", "ata-secure-erase"):
+        erase_flag = "--security-erase-enhanced" if method == "ata-secure-erase-enhanced" else "--security-erase"
+        return [
+            ["hdparm", "--user-master", "u", "--security-set-pass", ATA_ERASE_PASSWORD, device_path],
+            ["hdparm", "--user-master", "u", erase_flag, ATA_ERASE_PASSWORD, device_path],
+        ]
+    raise ValueError(f"Unknown purge method: {method}")
+
+def build_security_disable_command(device_path):
+    """Clears the temporary ATA password, so a failed erase does not leave the drive locked."""
+    return ["hdparm", "--user-master", "u", "--security-disable", ATA_ERASE_PASSWORD, device_path]
+
+def _find_key(data, key):
+    """Finds a key anywhere in nested nvme-cli JSON output."""
+    if isinstance(data, dict):
+        if key in data:
+            return data[key]
+        for value in data.values():
+            found = _find_key(value, key)
+            if found is not None:
+                return found
+    return None
+
+def wait_for_sanitize(device_path, runner, start_polls=SANITIZE_START_POLLS,
+                      timeout=SANITIZE_TIMEOUT_SECONDS):
+    """Polls `nvme sanitize-log` until the sanitize finishes, yielding progress."""
+    deadline = time.monotonic() + timeout
+    idle_polls = 0
+    while True:
+        result = runner.run(["nvme", "sanitize-log", device_path, "--output-format=json"])
+        if result.returncode != 0:
+            yield f"ERROR: nvme sanitize-log exited with code {result.returncode}"
+            return
+        try:
+            log = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            yield "ERROR: Could not parse nvme sanitize-log output."
+            return
+
+        sstat = int(_find_key(log, "sstat") or 0) & 0x7
+        sprog = int(_find_key(log, "sprog") or 0)
+        if sstat in (SANITIZE_COMPLETED, SANITIZE_COMPLETED_NO_DEALLOCATE):
+            return
+        if sstat == SANITIZE_FAILED:
+            yield "ERROR: NVMe sanitize operation failed."
+            return
+        if sstat == SANITIZE_NEVER:
+            idle_polls += 1
+            if idle_polls > start_polls:
+                yield "ERROR: NVMe sanitize did not start."
+                return
+        if time.monotonic() > deadline:
+            yield "ERROR: NVMe sanitize timed out."
+            return
+        yield f"{sprog * 100.0 / 65536:.2f}% done"
+        time.sleep(SANITIZE_POLL_SECONDS)
+
+def run_purge(device_path, method, runner=None):
+    """Runs a firmware purge and yields its output line by line, like run_nwipe."""
+    runner = runner or CommandRunner()
+    try:
+        for index, command in enumerate(build_purge_commands(device_path, method)):
+            yield f"Command: {' '.join(command)}"
+            for line in runner.stream(command):
+                yield line
+                if line.startswith("ERROR:"):
+                    if method.startswith("ata-") and index > 0:
+                        # The password is set but the erase failed
+                        disable = build_security_disable_command(device_path)
+                        yield f"Command: {' '.join(disable)}"
+                        yield from runner.stream(disable)
+                    return
+        if method.startswith("nvme-sanitize"):
+            yield from wait_for_sanitize(device_path, runner)
+        yield "100.00% done"
+    except FileNotFoundError as e:
+        yield f"ERROR: '{e.filename}' command not found. Is it installed and in your PATH?"
+    except Exception as e:
+        yield f"ERROR: An unexpected error occurred: {e}"
@@ -0,0 +1,231 @@
+import re
+import struct
+import zlib
+
+# Compact certificate payloads for QR codes that must verify offline.
+#
+# The signed certificate is encoded as deterministic CBOR (RFC 8949,
+# section 4.2), optionally zlib-compressed, then Base45 (RFC 9285), whose
+# alphabet is exactly the QR alphanumeric character set. A prefix tells
+# the decoder which variant it is reading:
+#
+#     SD1:<base45(zlib(cbor))>    SD0:<base45(cbor)>
+#
+# Hex strings (signature, key id, Merkle hashes) travel as CBOR byte
+# strings, half their size, and are turned back into lowercase hex on
+# decoding, so the certificate JSON is reproduced exactly.
+
+COMPRESSED_PREFIX = "SD1:"
+PLAIN_PREFIX = "SD0:"
+
+BASE45_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+BASE45_VALUES = {char: value for value, char in enumerate(BASE45_ALPHABET)}
+
+# Decompressed payloads larger than this are rejected (no zip bombs).
+MAX_PAYLOAD_SIZE = 64 * 1024
+
+# Strings shorter than this are left as text; the byte-string header
+# would eat most of the saving.
+MIN_HEX_LENGTH = 16
+HEX_REGEX = re.compile(r"(?:[0-9a-f]{2})+")
+
+def base45_encode(data):
+    out = []
+    for i in range(0, len(data) - 1, 2):
+        value = data[i] * 256 + data[i + 1]
+        value, c = divmod(value, 45)
+        e, d = divmod(value, 45)
+        out.append(BASE45_ALPHABET[c] + BASE45_ALPHABET[d] + BASE45_ALPHABET[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        out.append(BASE45_ALPHABET[c] + BASE45_ALPHABET[d])
+    return "".join(out)
+
+def base45_decode(text):
+    try:
+        values = [BASE45_VALUES[char] for char in text]
+    except KeyError:
+        raise ValueError("Invalid Base45 character") from None
+    if len(values) % 3 == 1:
+        raise ValueError("Invalid Base45 length")
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        if len(chunk) == 3:
+            value = chunk[0] + chunk[1] * 45 + chunk[2] * 45 * 45
+            if value > 0xFFFF:
+                raise ValueError("Invalid Base45 triplet")
+            out += value.to_bytes(2, "big")
+        else:
+            value = chunk[0] + chunk[1] * 45
+            if value > 0xFF:
+                raise ValueError("Invalid Base45 pair")
+            out.append(value)
+    return bytes(out)
+
+def _cbor_head(major, value):
+    if value < 24:
+        return bytes([major << 5 | value])
+    for info, size in ((24, 1), (25, 2), (26, 4), (27, 8)):
+        if value < 1 << (8 * size):
+            return bytes([major << 5 | info]) + value.to_bytes(size, "big")
+    raise ValueError("Integer too large for CBOR")
+
+def _cbor_float(value):
+    # Shortest of half, single and double precision that is exact
+    for info, fmt in ((25, ">e"), (26, ">f")):
+        try:
+            packed = struct.pack(fmt, value)
+        except (OverflowError, struct.error):
+            continue
+        if struct.unpack(fmt, packed)[0] == value or value != value:
+            return bytes([0xE0 | info]) + packed
+    return b"\xfb" + struct.pack(">d", value)
+
+def cbor_encode(obj):
+    """Encodes JSON-like data as deterministic CBOR."""
+    if obj is None:
+        return b"\xf6"
+    if obj is True:
+        return b"\xf5"
+    if obj is False:
+        return b"\xf4"
+    if isinstance(obj, int):
+        return _cbor_head(0, obj) if obj >= 0 else _cbor_head(1, -1 - obj)
+    if isinstance(obj, float):
+        return _cbor_float(obj)
+    if isinstance(obj, bytes):
+        return _cbor_head(2, len(obj)) + obj
+    if isinstance(obj, str):
+        data = obj.encode("utf-8")
+        return _cbor_head(3, len(data)) + data
+    if isinstance(obj, (list, tuple)):
+        return _cbor_head(4, len(obj)) + b"".join(cbor_encode(item) for item in obj)
+    if isinstance(obj, dict):
+        # Keys sorted by their encoded bytes
+        items = sorted((cbor_encode(key), cbor_encode(value)) for key, value in obj.items())
+        return _cbor_head(5, len(items)) + b"".join(key + value for key, value in items)
+    raise TypeError(f"Cannot encode {type(obj).__name__} as CBOR")
+
+def cbor_decode(data):
+    """Decodes CBOR produced by cbor_encode()."""
+    obj, offset = _cbor_decode_item(data, 0)
+    if offset != len(data):
+        raise ValueError("Trailing bytes after CBOR item")
+    return obj
+
+def _cbor_decode_item(data, offset):
+    if offset >= len(data):
+        raise ValueError("Truncated CBOR")
+    initial = data[offset]
+    major, info = initial >> 5, initial & 0x1F
+    offset += 1
+
+    if major == 7:
+        if info == 20:
+            return False, offset
+        if info == 21:
+            return True, offset
+        if info == 22:
+            return None, offset
+        formats = {25: (">e", 2), 26: (">f", 4), 27: (">d", 8)}
+        if info in formats:
+            fmt, size = formats[info]
+            if offset + size > len(data):
+                raise ValueError("Truncated CBOR")
+            return struct.unpack(fmt, data[offset:offset + size])[0], offset + size
+        raise ValueError(f"Unsupported CBOR simple value {info}")
+
+    if info < 24:
+        value = info
+    elif info <= 27:
+        size = 1 << (info - 24)
+        if offset + size > len(data):
+            raise ValueError("Truncated CBOR")
+        value = int.from_bytes(data[offset:offset + size], "big")
+        offset += size
+    else:
+        raise ValueError("Indefinite-length CBOR is not supported")
+
+    if major == 0:
+        return value, offset
+    if major == 1:
+        return -1 - value, offset
+    if major in (2, 3):
+        if offset + value > len(data):
+            raise ValueError("Truncated CBOR")
+        chunk = data[offset:offset + value]
+        return (bytes(chunk) if major == 2 else chunk.decode("utf-8")), offset + value
+    if major == 4:
+        items = []
+        for _ in range(value):
+            item, offset = _cbor_decode_item(data, offset)
+            items.append(item)
+        return items, offset
+    if major == 5:
+        result = {}
+        for _ in range(value):
+            key, offset = _cbor_decode_item(data, offset)
+            # Certificates are JSON objects, so only text keys are valid
+            if not isinstance(key, str):
+                raise ValueError("CBOR map key is not a text string")
+            result[key], offset = _cbor_decode_item(data, offset)
+        return result, offset
+    raise ValueError(f"Unsupported CBOR major type {major}")
+
+def _pack_hex(obj):
+    if isinstance(obj, str) and len(obj) >= MIN_HEX_LENGTH and HEX_REGEX.fullmatch(obj):
+        return bytes.fromhex(obj)
+    if isinstance(obj, dict):
+        return {key: _pack_hex(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_pack_hex(item) for item in obj]
+    return obj
+
+def _unpack_hex(obj):
+    if isinstance(obj, bytes):
+        return obj.hex()
+    if isinstance(obj, dict):
+        return {key: _unpack_hex(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_unpack_hex(item) for item in obj]
+    return obj
+
+def encode_certificate(certificate_with_signature, compress=True):
+    """Encodes a signed certificate dict as a QR alphanumeric payload string."""
+    data = cbor_encode(_pack_hex(certificate_with_signature))
+    if compress:
+        compressed = zlib.compress(data, 9)
+        # Tiny certificates can grow when compressed
+        if len(compressed) < len(data):
+            return COMPRESSED_PREFIX + base45_encode(compressed)
+    return PLAIN_PREFIX + base45_encode(data)
+
+def is_certificate_payload(text):
+    return text.startswith((COMPRESSED_PREFIX, PLAIN_PREFIX))
+
+def decode_certificate(text):
+    """Decodes a payload from encode_certificate() back into the certificate dict.
+
+    Raises ValueError if the payload is malformed.
+    """
+    text = text.strip()
+    if text.startswith(COMPRESSED_PREFIX):
+        decompressor = zlib.decompressobj()
+        try:
+            data = decompressor.decompress(base45_decode(text[len(COMPRESSED_PREFIX):]), MAX_PAYLOAD_SIZE)
+        except zlib.error as e:
+            raise ValueError(f"Invalid compressed payload: {e}") from None
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ValueError("Compressed payload is too large or truncated")
+    elif text.startswith(PLAIN_PREFIX):
+        data = base45_decode(text[len(PLAIN_PREFIX):])
+    else:
+        raise ValueError("Not a certificate payload")
+    try:
+        certificate = _unpack_hex(cbor_decode(data))
+    except (UnicodeDecodeError, TypeError, RecursionError):
+        raise ValueError("Malformed certificate payload") from None
+    if not isinstance(certificate, dict):
+        raise ValueError("Payload is not a certificate")
+    return certificate
@@ -0,0 +1,175 @@
+import errno
+import math
+import mmap
+import os
+import random
+import stat
+import time
+
+from wipe_engine import ALIGNMENT, DEFAULT_BLOCK_SIZE, allocate_buffer, fill_pattern
+
+# Sampling mode reads this many randomly placed ranges per GB of media.
+DEFAULT_SAMPLES_PER_GB = 8
+SAMPLE_RANGE_SIZE = 1024 * 1024
+
+# Mismatches are located and counted at this granularity.
+MISMATCH_BLOCK_SIZE = 4096
+MAX_REPORTED_MISMATCHES = 16
+
+GB = 1024 ** 3
+
+def subtract_ranges(offset, length, skip_ranges):
+    """Returns the (offset, length) pieces of a range outside `skip_ranges`."""
+    pieces = []
+    position, end = offset, offset + length
+    for skip_start, skip_end in skip_ranges:
+        if skip_end <= position or skip_start >= end:
+            continue
+        if skip_start > position:
+            pieces.append((position, skip_start - position))
+        position = max(position, skip_end)
+    if position < end:
+        pieces.append((position, end - position))
+    return pieces
+
+class ReadbackVerifier:
+    """Reads a wiped device back and checks it against the expected pattern.
+
+    Block devices are read with large O_DIRECT reads into one reusable
+    aligned buffer; regular files are memory mapped. Every chunk is compared
+    against a pre-filled pattern buffer in a single comparison, and only a
+    mismatching chunk is scanned further to count the bad blocks.
+
+    Ranges the wipe recorded as unwritable are skipped and reported
+    separately rather than failing the read.
+
+    Call run() and iterate over it for log lines; the outcome is stored in
+    `result` as certificate-ready fields.
+    """
+    def __init__(self, device_path, expected_pattern=b"\x00", mode="sample",
+                 samples_per_gb=DEFAULT_SAMPLES_PER_GB, block_size=DEFAULT_BLOCK_SIZE, skip_ranges=None):
+        if mode not in ("sample", "full"):
+            raise ValueError(f"Unknown verification mode: {mode}")
+        self.device_path = device_path
+        self.expected_pattern = expected_pattern
+        self.mode = mode
+        self.samples_per_gb = samples_per_gb
+        self.block_size = block_size
+        # [start, end) byte ranges the wipe recorded as unwritable
+        self.skip_ranges = sorted(skip_ranges or [])
+        self.result = None
+
+    def plan_ranges(self, size):
+        """Returns the sorted (offset, length) ranges to read."""
+        if self.mode == "full":
+            return [(offset, min(self.block_size, size - offset))
+                    for offset in range(0, size, self.block_size)]
+
+        # Random, aligned ranges chosen at verification time, so the device
+        # cannot know in advance which regions will be checked.
+        range_size = min(SAMPLE_RANGE_SIZE, size - size % ALIGNMENT) or size
+        slots = max(size // range_size, 1)
+        count = min(max(math.ceil(size / GB * self.samples_per_gb), 1), slots)
+        chosen = random.SystemRandom().sample(range(slots), count)
+        return [(slot * range_size, min(range_size, size - slot * range_size)) for slot in sorted(chosen)]
+
+    def count_mismatches(self, data, expected, offset, mismatches):
+        """Counts mismatching blocks inside a chunk that failed the fast check."""
+        bad_blocks = 0
+        for start in range(0, len(data), MISMATCH_BLOCK_SIZE):
+            end = start + MISMATCH_BLOCK_SIZE
+            if data[start:end] != expected[start:end]:
+                bad_blocks += 1
+                if len(mismatches) < MAX_REPORTED_MISMATCHES:
+                    mismatches.append(offset + start)
+        return bad_blocks
+
+    def run(self):
+        """Verifies the device and yields log lines."""
+        start_time = time.monotonic()
+        mode = os.stat(self.device_path).st_mode
+        is_block_device = stat.S_ISBLK(mode)
+
+        flags = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0)
+        direct = False
+        if is_block_device and hasattr(os, "O_DIRECT"):
+            try:
+                fd = os.open(self.device_path, flags | os.O_DIRECT)
+                direct = True
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                fd = os.open(self.device_path, flags)
+        else:
+            fd = os.open(self.device_path, flags)
+
+        buffer = mapped = None
+        try:
+            size = os.lseek(fd, 0, os.SEEK_END)
+            ranges = self.plan_ranges(size) if size else []
+            yield f"Verifying {self.device_path} ({self.mode} mode, {len(ranges)} reads)"
+
+            expected_buffer = allocate_buffer(self.block_size)
+            fill_pattern(expected_buffer, self.expected_pattern)
+            expected = expected_buffer[:]
+            expected_buffer.close()
+
+            if is_block_device:
+                buffer = allocate_buffer(self.block_size)
+                view = memoryview(buffer)
+            else:
+                mapped = mmap.mmap(fd, size, access=mmap.ACCESS_READ) if size else None
+                if mapped is not None and hasattr(mapped, "madvise"):
+                    advice = mmap.MADV_SEQUENTIAL if self.mode == "full" else mmap.MADV_RANDOM
+                    mapped.madvise(advice)
+
+            bytes_verified = 0
+            bytes_skipped = 0
+            bad_blocks = 0
+            mismatches = []
+            last_report = time.monotonic()
+
+            for index, (range_offset, range_length) in enumerate(ranges):
+                pieces = subtract_ranges(range_offset, range_length, self.skip_ranges)
+                bytes_skipped += range_length - sum(length for _, length in pieces)
+                for offset, length in pieces:
+                    if is_block_device:
+                        read = os.preadv(fd, [view[:length]], offset)
+                        if read != length:
+                            raise OSError(errno.EIO, f"Short read at offset {offset}")
+                        data = buffer[:length]
+                    else:
+                        data = mapped[offset:offset + length]
+
+                    # Whole-chunk comparison runs as a single memcmp.
+                    chunk_expected = expected if length == self.block_size else expected[:length]
+                    if data != chunk_expected:
+                        bad_blocks += self.count_mismatches(data, chunk_expected, offset, mismatches)
+                    bytes_verified += length
+
+                now = time.monotonic()
+                if now - last_report >= 1.0:
+                    last_report = now
+                    yield f"Verified {(index + 1) * 100.0 / len(ranges):.2f}%"
+
+            elapsed = max(time.monotonic() - start_time, 1e-9)
+            self.result = {
+                "result": "Passed" if bad_blocks == 0 and size else "Failed",
+                "mode": self.mode,
+                "expectedPattern": "0x" + self.expected_pattern.hex(),
+                "bytesVerified": bytes_verified,
+                "coveragePercent": round(bytes_verified * 100.0 / size, 4) if size else 0.0,
+                "throughputMBps": round(bytes_verified / elapsed / 1e6, 1),
+                "mismatchedBlocks": bad_blocks,
+                "mismatchOffsets": mismatches,
+                "skippedBadBytes": bytes_skipped,
+                "readMode": "O_DIRECT" if direct else ("buffered" if is_block_device else "mmap"),
+            }
+            yield f"Verification {self.result['result']}: {bytes_verified} bytes checked, {bad_blocks} mismatched blocks"
+        finally:
+            if buffer is not None:
+                view.release()
+                buffer.close()
+            if mapped is not None:
+                mapped.close()
+            os.close(fd)
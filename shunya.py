@@ -0,0 +1,288 @@
+import argparse
+import importlib
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+# Headless command line for the wiper: list disks, wipe, verify and issue
+# certificates, with JSON (or NDJSON for streams) on stdout.
+#
+# Only the standard library is imported up front. Each command imports
+# what it needs through lazy_import(), so `shunya list` never loads Qt,
+# cryptography, reportlab or qrcode. --startup-report prints where the
+# start-up time went.
+
+STARTED = time.perf_counter()
+
+# `shunya list` must answer well within this many seconds.
+STARTUP_BUDGET_SECONDS = 0.5
+
+DEFAULT_PRIVATE_KEY = "private_key.pem"
+DEFAULT_PUBLIC_KEYS = ("public_key.pem", "keys")
+
+# Seconds spent importing each module through lazy_import()
+IMPORT_TIMES = {}
+
+output_lock = threading.Lock()
+
+def lazy_import(name):
+    """Imports a module on first use and records how long it took."""
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - start
+    return module
+
+def emit(obj):
+    """Writes one JSON line to stdout."""
+    line = json.dumps(obj, default=str)
+    with output_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+def fail(message, code=2):
+    emit({"error": message})
+    return code
+
+def process_age():
+    """Returns seconds since the process started (interpreter start-up included), or None."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 2)
+
+def startup_report(command, elapsed):
+    """Prints import and command timings to stderr; warns when `list` is over budget."""
+    report = {
+        "command": command,
+        "elapsedSeconds": round(elapsed, 4),
+        "processSeconds": process_age(),
+        "budgetSeconds": STARTUP_BUDGET_SECONDS,
+        "imports": {name: round(seconds, 4) for name, seconds in IMPORT_TIMES.items()},
+        "heavyModulesLoaded": [name for name in ("PyQt5", "cryptography", "reportlab", "qrcode")
+                               if name in sys.modules],
+    }
+    # Set by the launcher of a build_bundle.py zipapp
+    bundle_info = getattr(sys.modules.get("__main__"), "BUNDLE_INFO", None)
+    if bundle_info is not None:
+        report["bundle"] = bundle_info
+    print(json.dumps(report), file=sys.stderr)
+    if command == "list" and elapsed > STARTUP_BUDGET_SECONDS:
+        print(f"WARNING: start-up took {elapsed:.3f}s, over the {STARTUP_BUDGET_SECONDS}s budget",
+              file=sys.stderr)
+
+def disk_entry(disk):
+    """Returns an inventory dict with the safety verdict added."""
+    is_safe, reason = lazy_import("disk_info").DiskInfo(disk).is_safe()
+    return dict(disk, safe=is_safe, safetyReason=reason)
+
+def scan_disks():
+    inventory = lazy_import("disk_inventory").DiskInventory()
+    inventory.refresh()
+    return inventory.snapshot()
+
+def load_keyring(paths):
+    keyring = lazy_import("verify_module").Keyring()
+    for path in paths:
+        if os.path.exists(path):
+            keyring.load(path)
+    return keyring
+
+# --- Commands ---
+
+def cmd_list(args):
+    disks = [disk_entry(disk) for disk in scan_disks()]
+    if args.safe_only:
+        disks = [disk for disk in disks if disk["safe"]]
+    emit(disks)
+    return 0
+
+def cmd_wipe(args):
+    if not args.yes and not args.dry_run:
+        return fail("Refusing to wipe without --yes.")
+
+    inventory = {disk["name"]: disk for disk in scan_disks()}
+    disks = []
+    for name in args.disks:
+        name = os.path.basename(name)
+        if name not in inventory:
+            return fail(f"Unknown disk: {name}")
+        entry = disk_entry(inventory[name])
+        if not entry["safe"]:
+            return fail(f"Refusing to wipe {name}: {entry['safetyReason']}")
+        disks.append(inventory[name])
+
+    wipe_job = lazy_import("wipe_job")
+    journal = None if args.dry_run else lazy_import("wipe_journal").WipeJournal()
+    verify_mode = None if args.verify == "none" else args.verify
+    jobs = {disk["name"]: wipe_job.WipeJob(disk["name"], args.method, is_dry_run=args.dry_run,
+                                           engine=args.engine, fallback_engine=args.fallback_engine,
+                                           verify_mode=verify_mode, disk_data=disk, journal=journal)
+            for disk in disks}
+
+    def run_job(disk):
+        name = disk["name"]
+        completed = jobs[name].run(
+            log=lambda line: emit({"event": "log", "disk": name, "message": line}),
+            on_progress=lambda record: emit(dict(record._asdict(), event="progress", disk=name)))
+        report = jobs[name].report
+        emit({"event": "result", "disk": name, "completed": completed, "report": report})
+        return completed and report.get("status") is None
+
+    scheduler = lazy_import("wipe_scheduler").WipeScheduler(disks)
+
+    # Ctrl-C stops every engine at its next checkpoint instead of killing it.
+    # The handler only sets events: it may interrupt the scheduler holding its lock.
+    def cancel_all(signum, frame):
+        scheduler.request_cancel()
+        for job in jobs.values():
+            job.cancel()
+    signal.signal(signal.SIGINT, cancel_all)
+    signal.signal(signal.SIGTERM, cancel_all)
+
+    results = scheduler.run(run_job)
+
+    if args.report and not args.dry_run:
+        with open(args.report, "w") as f:
+            json.dump({"disks": disks, "reports": {name: job.report for name, job in jobs.items()}}, f, indent=4)
+    return 0 if all(results.values()) else 1
+
+def cmd_verify(args):
+    if args.certificate == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.certificate, "r") as f:
+            text = f.read()
+
+    qr_payload = lazy_import("qr_payload")
+    try:
+        if qr_payload.is_certificate_payload(text.strip()):
+            certificate = qr_payload.decode_certificate(text)
+        else:
+            certificate = json.loads(text)
+    except ValueError as e:
+        return fail(f"Invalid certificate: {e}")
+    if not isinstance(certificate, dict):
+        return fail("Invalid certificate: not a JSON object")
+
+    keyring = load_keyring(args.public_key or DEFAULT_PUBLIC_KEYS)
+    if not len(keyring):
+        return fail("No public keys found.")
+    is_valid, message = keyring.verify(certificate)
+    emit({
+        "valid": is_valid,
+        "message": message,
+        "certificateId": certificate.get("certificateId"),
+        "keyId": keyring.certificate_key_id(certificate),
+    })
+    return 0 if is_valid else 1
+
+def cmd_issue(args):
+    disks = []
+    wipe_reports = {}
+    for path in args.reports:
+        with open(path, "r") as f:
+            session = json.load(f)
+        disks.extend(session["disks"])
+        wipe_reports.update(session["reports"])
+    if not disks:
+        return fail("No disks in the wipe reports.")
+
+    certificate_pipeline = lazy_import("certificate_pipeline")
+    pipeline = certificate_pipeline.CertificatePipeline(args.private_key)
+    issued = pipeline.issue(disks, wipe_reports).result()
+    os.makedirs(args.out, exist_ok=True)
+    certificate_pipeline.save_artifacts(issued["files"], args.out)
+
+    emit({
+        "files": [os.path.join(args.out, name) for name in issued["files"]],
+        "certificates": [dict(cert["certificate_data"], signature=cert["signature"].hex())
+                         for cert in issued["certificates"]],
+    })
+    return 0
+
+def cmd_daemon(args):
+    """Streams the disk inventory and hotplug events as NDJSON until stopped."""
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    inventory = lazy_import("disk_inventory").DiskInventory()
+    inventory.subscribe(lambda event, disk: emit({"event": event} if disk is None
+                                                 else {"event": event, "disk": disk_entry(disk)}))
+    inventory.start()
+    try:
+        while not stop.wait(1.0):
+            pass
+    finally:
+        inventory.stop()
+    return 0
+
+def cmd_gui(args):
+    gui = lazy_import("main")
+    # The GUI only returns on exit, so report once it is loaded
+    if args.startup_report:
+        startup_report(args.command, time.perf_counter() - STARTED)
+    gui.main()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="shunya", description="Secure disk wiper (headless).")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print import and start-up timings to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="list wipe candidate disks")
+    list_parser.add_argument("--safe-only", action="store_true", help="only disks safe to wipe")
+    list_parser.set_defaults(func=cmd_list)
+
+    wipe_parser = commands.add_parser("wipe", help="wipe and verify disks, streaming NDJSON events")
+    wipe_parser.add_argument("disks", nargs="+", help="disk names, e.g. sdb")
+    wipe_parser.add_argument("--method", default="dodshort")
+    wipe_parser.add_argument("--engine", choices=("purge", "native", "nwipe"), default="purge")
+    wipe_parser.add_argument("--fallback-engine", choices=("native", "nwipe"), default="native")
+    wipe_parser.add_argument("--verify", choices=("sample", "full", "none"), default="sample")
+    wipe_parser.add_argument("--dry-run", action="store_true")
+    wipe_parser.add_argument("--yes", action="store_true", help="confirm the data will be destroyed")
+    wipe_parser.add_argument("--report", help="write the wipe reports here, for `shunya issue`")
+    wipe_parser.set_defaults(func=cmd_wipe)
+
+    verify_parser = commands.add_parser("verify", help="verify a certificate (JSON or offline QR payload)")
+    verify_parser.add_argument("certificate", help="certificate file, or - for stdin")
+    verify_parser.add_argument("--public-key", action="append",
+                               help="public key PEM or directory of PEMs (repeatable)")
+    verify_parser.set_defaults(func=cmd_verify)
+
+    issue_parser = commands.add_parser("issue", help="issue certificates from wipe reports")
+    issue_parser.add_argument("reports", nargs="+", help="report files written by `shunya wipe --report`")
+    issue_parser.add_argument("--private-key", default=DEFAULT_PRIVATE_KEY)
+    issue_parser.add_argument("--out", default=".", help="directory for the certificate files")
+    issue_parser.set_defaults(func=cmd_issue)
+
+    daemon_parser = commands.add_parser("daemon", help="stream disk hotplug events as NDJSON")
+    daemon_parser.set_defaults(func=cmd_daemon)
+
+    gui_parser = commands.add_parser("gui", help="start the graphical interface")
+    gui_parser.set_defaults(func=cmd_gui)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        code = args.func(args)
+    except OSError as e:
+        code = fail(str(e))
+    if args.startup_report and args.command != "gui":
+        startup_report(args.command, time.perf_counter() - STARTED)
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
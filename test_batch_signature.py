@@ -0,0 +1,72 @@
+import pytest
+
+from certificate_module import CertificateSigner
+from key_generator import generate_keys
+from verify_module import Keyring, merkle_leaf, merkle_root_from_proof
+
+@pytest.fixture(scope="module")
+def keys(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("keys")
+    private_key_path = str(directory / "private_key.pem")
+    public_key_path = str(directory / "public_key.pem")
+    generate_keys("ed25519", private_key_path, public_key_path)
+    return private_key_path, public_key_path
+
+@pytest.fixture
+def batch(keys):
+    """Three certificates signed as one batch, each with its hex signature."""
+    certificates = [{"certificateId": f"cert-{index}", "deviceSerial": f"SN{index}", "status": "Success"}
+                    for index in range(3)]
+    signatures = CertificateSigner(keys[0]).sign_batch(certificates)
+    return [dict(cert, signature=signature.hex()) for cert, signature in zip(certificates, signatures)]
+
+@pytest.fixture
+def keyring(keys):
+    return Keyring([keys[1]])
+
+def test_every_certificate_in_a_batch_verifies(batch, keyring):
+    assert len({cert["signature"] for cert in batch}) == 1
+    for cert in batch:
+        assert keyring.verify(cert) == (True, "Certificate is authentic.")
+
+def test_proof_leads_to_the_declared_root(batch):
+    for cert in batch:
+        data = {key: value for key, value in cert.items() if key not in ("signature", "batchProof")}
+        root = merkle_root_from_proof(merkle_leaf(data), cert["batchProof"]["path"])
+        assert root.hex() == cert["batchProof"]["root"]
+
+def test_tampered_field_is_rejected(batch, keyring):
+    cert = dict(batch[1], status="Failed")
+    is_valid, message = keyring.verify(cert)
+    assert not is_valid
+    assert message.startswith("Batch proof does not match")
+
+def test_tampered_proof_path_is_rejected(batch, keyring):
+    proof = batch[0]["batchProof"]
+    side, sibling = proof["path"][0]
+    path = [[side, ("00" if sibling[:2] != "00" else "ff") + sibling[2:]]] + proof["path"][1:]
+    is_valid, _ = keyring.verify(dict(batch[0], batchProof=dict(proof, path=path)))
+    assert not is_valid
+
+def test_swapped_proof_side_is_rejected(batch, keyring):
+    proof = batch[0]["batchProof"]
+    path = [["R" if side == "L" else "L", sibling] for side, sibling in proof["path"]]
+    is_valid, _ = keyring.verify(dict(batch[0], batchProof=dict(proof, path=path)))
+    assert not is_valid
+
+def test_forged_root_is_rejected(batch, keyring):
+    # A consistent proof to a root the key never signed
+    cert = dict(batch[2], status="Failed")
+    data = {key: value for key, value in cert.items() if key not in ("signature", "batchProof")}
+    forged = dict(cert["batchProof"], path=[], root=merkle_leaf(data).hex())
+    is_valid, message = keyring.verify(dict(cert, batchProof=forged))
+    assert not is_valid
+    assert message.startswith("Batch signature is invalid")
+
+@pytest.mark.parametrize("proof", [
+    {"root": "00" * 32},                         # No path
+    {"root": "zz", "path": []},                  # Root not hex
+    {"root": "00" * 32, "path": [["X", "00"]]},  # Unknown side
+])
+def test_malformed_proof_is_rejected(batch, keyring, proof):
+    assert keyring.verify(dict(batch[0], batchProof=proof)) == (False, "Invalid batch proof format.")
@@ -3,8 +3,8 @@ import os
 import json
 from key_generator import generate_keys
 from certificate_module import (
+    CertificateSigner,
     create_certificate_data,
-    sign_certificate,
     generate_pdf_certificate,
     generate_json_certificate,
     generate_qr_code,
@@ -24,11 +24,11 @@ def main():
 
     # 1. Generate Keys
     if not (os.path.exists("private_key.pem") and os.path.exists("public_key.pem")):
-        print("Generating RSA keys...")
+        print("Generating signing keys...")
         generate_keys()
         print("  -> Done.")
     else:
-        print("RSA keys already exist.")
+        print("Signing keys already exist.")
 
     # 2. Create Certificate
     print("Creating certificate data...")
@@ -38,19 +38,20 @@ def main():
 
     # 3. Sign Certificate
     print("Signing certificate...")
-    signature = sign_certificate(certificate_data, "private_key.pem")
+    signer = CertificateSigner("private_key.pem")
+    signature = signer.sign_many([certificate_data])[0]
     print("  -> Done.")
 
-    # 4. Generate Certificate Files
-    print("Generating PDF and JSON certificates...")
-    generate_pdf_certificate(certificate_data, signature, "certificate.pdf")
-    generate_json_certificate(certificate_data, signature, "certificate.json")
-    print("  -> Done.")
-
-    # 5. Generate QR Code
+    # 4. Generate QR Code
     print("Generating QR code...")
     qr_data = json.dumps({"certificateId": certificate_data["certificateId"]})
-    generate_qr_code(qr_data, "certificate_qr.png")
+    qr_matrix = generate_qr_code(qr_data)
+    print("  -> Done.")
+
+    # 5. Generate Certificate Files
+    print("Generating PDF and JSON certificates...")
+    generate_pdf_certificate(certificate_data, signature, qr_matrix, "certificate.pdf")
+    generate_json_certificate(certificate_data, signature, "certificate.json")
     print("  -> Done.")
 
     # 6. Verify Signature
@@ -0,0 +1,75 @@
+import zlib
+
+import pytest
+
+from qr_payload import (
+    COMPRESSED_PREFIX,
+    PLAIN_PREFIX,
+    base45_decode,
+    base45_encode,
+    cbor_decode,
+    cbor_encode,
+    decode_certificate,
+    encode_certificate,
+)
+
+CERTIFICATE = {
+    "certificateId": "5b0c3f62-8c7e-4d0e-9a51-0d6f1c2b7e11",
+    "deviceModel": "Samsung 970 EVO",
+    "deviceSerial": "S4PUNELD571717",
+    "deviceSize": "1 TB",
+    "keyId": "bd8f5c45fae6dd54",
+    "signature": "ab" * 64,
+    "status": "Success",
+    "verification": {"bytesVerified": 8388608, "coveragePercent": 100.0, "mismatchOffsets": []},
+    "batchProof": {"index": 1, "size": 3, "root": "cd" * 32, "path": [["L", "ef" * 32]]},
+}
+
+def test_base45_rfc_vectors():
+    # RFC 9285, section 4.3
+    assert base45_encode(b"AB") == "BB8"
+    assert base45_encode(b"Hello!!") == "%69 VD92EX0"
+    assert base45_encode(b"ietf!") == "QED8WEX0"
+    assert base45_decode("QED8WEX0") == b"ietf!"
+
+@pytest.mark.parametrize("text", ["GGW", "A", "ab"])
+def test_base45_rejects_malformed(text):
+    # Out-of-range triplet, dangling character, characters outside the alphabet
+    with pytest.raises(ValueError):
+        base45_decode(text)
+
+def test_cbor_rfc_vectors():
+    # RFC 8949, appendix A
+    assert cbor_encode(0) == bytes.fromhex("00")
+    assert cbor_encode(1000000) == bytes.fromhex("1a000f4240")
+    assert cbor_encode(-1000) == bytes.fromhex("3903e7")
+    assert cbor_encode(1.5) == bytes.fromhex("f93e00")
+    assert cbor_encode({"a": 1, "b": [2, 3]}) == bytes.fromhex("a26161016162820203")
+    assert cbor_decode(bytes.fromhex("a26161016162820203")) == {"a": 1, "b": [2, 3]}
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_certificate_round_trip(compress):
+    payload = encode_certificate(CERTIFICATE, compress=compress)
+    assert payload.startswith(COMPRESSED_PREFIX if compress else PLAIN_PREFIX)
+    assert decode_certificate(payload) == CERTIFICATE
+
+@pytest.mark.parametrize("payload", [
+    "SD9:ABC",                                          # Unknown prefix
+    PLAIN_PREFIX + "A",                                 # Bad Base45 length
+    PLAIN_PREFIX + base45_encode(b"\xa1\x61"),          # Truncated map
+    PLAIN_PREFIX + base45_encode(cbor_encode([1, 2])),  # Not a map
+    PLAIN_PREFIX + base45_encode(b"\x01\x02"),          # Trailing bytes
+    PLAIN_PREFIX + base45_encode(b"\x9f"),              # Indefinite length
+    COMPRESSED_PREFIX + base45_encode(b"not zlib"),
+    COMPRESSED_PREFIX + base45_encode(zlib.compress(b"\x00" * (128 * 1024))),  # Too large
+])
+def test_malformed_payloads_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        decode_certificate(payload)
+
+@pytest.mark.parametrize("key", [b"\x41\x78", b"\x01"])
+def test_non_text_map_keys_are_rejected(key):
+    # {b"x": 1} and {1: 1} cannot be certificate JSON
+    payload = PLAIN_PREFIX + base45_encode(b"\xa1" + key + b"\x01")
+    with pytest.raises(ValueError):
+        decode_certificate(payload)
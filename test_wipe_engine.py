@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from wipe_engine import BLANK_PATTERN, get_wipe_passes, run_native_wipe
+
+BLOCK_SIZE = 64 * 1024
+# Not a multiple of the block size, so the last write is a partial block
+IMAGE_SIZE = 3 * 1024 * 1024 + 4096 + 512
+
+def make_image(tmp_path):
+    image = tmp_path / "disk.img"
+    image.write_bytes(b"\xa5" * IMAGE_SIZE)
+    return image
+
+@pytest.mark.parametrize("method", ["dodshort", "nist800-88", "random"])
+def test_every_method_ends_with_a_blank_pass(method):
+    assert get_wipe_passes(method)[-1] == BLANK_PATTERN
+
+def test_unknown_method_is_an_error(tmp_path):
+    lines = list(run_native_wipe(str(make_image(tmp_path)), method="bogus", block_size=BLOCK_SIZE))
+    assert lines[-1].startswith("ERROR")
+
+@pytest.mark.parametrize("method", ["dodshort", "nist800-88", "random"])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_wipe_zeroes_the_whole_image(tmp_path, method, workers):
+    image = make_image(tmp_path)
+    lines = list(run_native_wipe(str(image), method=method, block_size=BLOCK_SIZE, workers=workers))
+
+    assert lines[-1] == f"Native wipe of {image} completed."
+    assert not any(line.startswith("ERROR") for line in lines)
+    progress = [float(line.split("%")[0]) for line in lines if line.endswith("% done")]
+    assert progress == sorted(progress) and progress[-1] == 100.0
+    assert image.stat().st_size == IMAGE_SIZE
+    assert image.read_bytes() == bytes(IMAGE_SIZE)
+
+def test_multi_byte_pattern_restarts_at_every_block(tmp_path):
+    image = make_image(tmp_path)
+    pattern = b"\x92\x49\x24"
+    list(run_native_wipe(str(image), block_size=BLOCK_SIZE, passes=[pattern]))
+
+    data = image.read_bytes()
+    block = (pattern * (BLOCK_SIZE // len(pattern) + 1))[:BLOCK_SIZE]
+    for offset in range(0, IMAGE_SIZE, BLOCK_SIZE):
+        assert data[offset:offset + BLOCK_SIZE] == block[:IMAGE_SIZE - offset]
+
+def test_stop_event_checkpoints_and_stops(tmp_path):
+    image = make_image(tmp_path)
+    stop_event = threading.Event()
+    stop_event.set()
+    checkpoints = []
+    lines = list(run_native_wipe(str(image), block_size=BLOCK_SIZE, passes=[b"\xff", BLANK_PATTERN],
+                                 stop_event=stop_event,
+                                 on_checkpoint=lambda pass_index, stripes: checkpoints.append((pass_index, stripes))))
+
+    assert lines[-1].startswith("Wipe stopped at pass 1")
+    assert checkpoints and checkpoints[-1][0] == 0
@@ -0,0 +1,72 @@
+from wipe_engine import BLANK_PATTERN, run_native_wipe
+from wipe_journal import WipeJournal, decode_passes
+
+MiB = 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+
+def start_job(journal, path, passes):
+    return journal.start_job(str(path), "SN1", 4 * MiB, "zero", passes, BLOCK_SIZE, 2)
+
+def test_checkpoint_survives_a_restart(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    journal = WipeJournal(journal_path)
+    job_id = start_job(journal, "/dev/sdx", [b"\x55", None, BLANK_PATTERN])
+    journal.checkpoint(job_id, 1, [[0, 2 * MiB, 1 * MiB], [2 * MiB, 4 * MiB, 3 * MiB]])
+
+    job = WipeJournal(journal_path).find_resumable("SN1", 4 * MiB)
+    assert job["job"] == job_id
+    assert job["pass"] == 1
+    assert job["offset"] == 1 * MiB
+    assert job["stripes"] == [[0, 2 * MiB, 1 * MiB], [2 * MiB, 4 * MiB, 3 * MiB]]
+    assert decode_passes(job["passes"]) == [b"\x55", None, BLANK_PATTERN]
+    assert WipeJournal(journal_path).find_resumable("SN2", 4 * MiB) is None
+
+def test_finished_jobs_are_not_resumable(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    journal = WipeJournal(journal_path)
+    completed = start_job(journal, "/dev/sdx", [BLANK_PATTERN])
+    abandoned = start_job(journal, "/dev/sdy", [BLANK_PATTERN])
+    journal.complete(completed)
+    journal.abandon(abandoned)
+    assert journal.pending_jobs() == []
+
+    # Nothing to resume, so the next start compacts the journal
+    WipeJournal(journal_path)
+    assert (tmp_path / "journal.jsonl").read_text() == ""
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    journal = WipeJournal(str(journal_path))
+    job_id = start_job(journal, "/dev/sdx", [BLANK_PATTERN])
+    journal.checkpoint(job_id, 0, [[0, 4 * MiB, 2 * MiB]])
+    with open(journal_path, "a") as f:
+        f.write('{"event": "checkpoint", "job": "')  # Power loss mid-write
+
+    job = WipeJournal(str(journal_path)).find_resumable("SN1", 4 * MiB)
+    assert job["offset"] == 2 * MiB
+
+def test_resume_continues_from_the_checkpoint(tmp_path):
+    image = tmp_path / "disk.img"
+    image.write_bytes(b"\xaa" * (4 * MiB))
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    # A crash after the first stripe wrote 1 MiB and the second none
+    journal = WipeJournal(journal_path)
+    job_id = start_job(journal, image, [BLANK_PATTERN])
+    journal.checkpoint(job_id, 0, [[0, 2 * MiB, 1 * MiB], [2 * MiB, 4 * MiB, 2 * MiB]])
+
+    journal = WipeJournal(journal_path)
+    job = journal.find_resumable("SN1", 4 * MiB)
+    lines = list(run_native_wipe(
+        job["device"], block_size=job["blockSize"], workers=job["workers"],
+        passes=decode_passes(job["passes"]), start_pass=job["pass"], resume_stripes=job["stripes"],
+        on_checkpoint=lambda pass_index, stripes: journal.checkpoint(job["job"], pass_index, stripes)))
+    journal.complete(job["job"])
+
+    assert not any(line.startswith("ERROR") for line in lines)
+    assert "Resuming at offset 1048576" in lines
+    data = image.read_bytes()
+    # The range the checkpoint marked as written is not written again
+    assert data[:1 * MiB] == b"\xaa" * MiB
+    assert data[1 * MiB:] == bytes(3 * MiB)
+    assert journal.pending_jobs() == []
@@ -1,83 +1,402 @@
 
 import os
+import hmac
+import io
 import json
+import multiprocessing
+import queue
 import sqlite3
+import sys
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from flask import Flask, request, render_template, redirect, url_for, g
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.exceptions import InvalidSignature
+from flask import Flask, Response, request, render_template, redirect, url_for, g, jsonify, stream_with_context
+
+# Share the verification logic with the wiping tool in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from verify_module import SHORT_DIGEST_LENGTH, Keyring, certificate_digest
+from qr_payload import decode_certificate, is_certificate_payload
 
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['DATABASE'] = 'verification.db'
+# A signed certificate is a couple of KB; larger requests are refused
+# before their body is read.
+app.config['MAX_CONTENT_LENGTH'] = 64 * 1024
+# Bulk uploads (zip archives or NDJSON streams of certificates)
+app.config['BULK_MAX_CONTENT_LENGTH'] = 512 * 1024 * 1024
+# Verification processes, certificates per process pool task, tasks in
+# flight per pool process.
+app.config['BULK_WORKERS'] = os.cpu_count() or 1
+app.config['BULK_CHUNK_SIZE'] = 64
+app.config['BULK_PREFETCH'] = 2
+# Audit and cache rows are written in the background, at most this many
+# per transaction and at most this many seconds after they were queued.
+app.config['AUDIT_BATCH_SIZE'] = 500
+app.config['AUDIT_FLUSH_INTERVAL'] = 0.5
+# Verification results remembered in memory per worker, and how long
+# clients may reuse a result (a certificate's verdict never changes).
+app.config['RESULT_CACHE_SIZE'] = 4096
+app.config['RESULT_MAX_AGE'] = 24 * 60 * 60
+# The legacy single key, plus any number of keys dropped into ../keys/
+app.config['PUBLIC_KEY_PATHS'] = ['../public_key.pem', '../keys']
 
 # --- Database Functions ---
 
+# WAL lets readers proceed while a writer commits; with WAL, NORMAL
+# synchronous only fsyncs at checkpoints and remains crash-safe.
+DB_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+)
+
+# Columns added after the first release, for databases created before them.
+# Each is (table, column, definition).
+COLUMN_MIGRATIONS = (
+    ('verifications', 'certificate_id', 'TEXT'),
+)
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def connect_db():
+    db = sqlite3.connect(app.config['DATABASE'], timeout=5.0)
+    db.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        db.execute(pragma)
+    return db
+
 def get_db():
-    db = getattr(g, '_database', None)
-    if db is None:
-        db = g._database = sqlite3.connect(app.config['DATABASE'])
-        db.row_factory = sqlite3.Row
+    """Returns this thread's connection, opened once and then reused."""
+    db = getattr(_local, 'db', None)
+    if db is None or getattr(_local, 'pid', None) != os.getpid():
+        db = _local.db = connect_db()
+        _local.pid = os.getpid()
+    if not _schema_ready:
+        init_db(db)
     return db
 
-@app.teardown_appcontext
-def close_connection(exception):
-    db = getattr(g, '_database', None)
-    if db is not None:
-        db.close()
+def migrate_db(db):
+    """Adds columns that are missing from tables created by older versions."""
+    for table, column, definition in COLUMN_MIGRATIONS:
+        columns = [row[1] for row in db.execute(f'PRAGMA table_info({table})')]
+        if columns and column not in columns:
+            db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
 
-def init_db():
-    with app.app_context():
-        db = get_db()
+def init_db(db=None):
+    """Brings the schema up to date without touching existing rows."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        db = db or connect_db()
+        migrate_db(db)
         with app.open_resource('schema.sql', mode='r') as f:
-            db.cursor().executescript(f.read())
+            db.executescript(f.read())
         db.commit()
+        _schema_ready = True
 
-# --- Verification Logic ---
+class AuditWriter:
+    """Writes audit and cache rows on a background thread, in batches.
 
-def verify_certificate_signature(certificate_path):
-    public_key_path = '../public_key.pem'
-    if not os.path.exists(public_key_path):
-        return False, "Public key not found on server."
+    write() only queues the row, so a verification never waits for a
+    commit. Rows are flushed with executemany, one transaction per batch;
+    if a batch fails, its rows are retried one by one so a single bad row
+    only loses itself.
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
 
-    with open(public_key_path, "rb") as key_file:
-        public_key = serialization.load_pem_public_key(key_file.read())
+    def write(self, sql, params):
+        self._ensure_started()
+        self.queue.put((sql, params))
 
-    with open(certificate_path, "r") as f:
-        try:
-            cert_data = json.load(f)
-        except json.JSONDecodeError:
-            return False, "Invalid JSON format."
+    def _ensure_started(self):
+        # Started lazily, and again in each forked server worker
+        if self.thread is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread is None or self.pid != os.getpid():
+                self.queue = queue.Queue()
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
 
-    signature_hex = cert_data.pop("signature", None)
-    if not signature_hex:
-        return False, "No signature found in certificate."
+    def _take_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + app.config['AUDIT_FLUSH_INTERVAL']
+        while len(batch) < app.config['AUDIT_BATCH_SIZE']:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
 
-    try:
-        signature = bytes.fromhex(signature_hex)
-    except ValueError:
-        return False, "Invalid signature format."
+    def _run(self):
+        db = get_db()
+        while True:
+            batch = self._take_batch()
+            statements = {}
+            for sql, params in batch:
+                statements.setdefault(sql, []).append(params)
+            try:
+                with db:
+                    for sql, rows in statements.items():
+                        db.executemany(sql, rows)
+            except sqlite3.Error:
+                self._write_rows(db, batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _write_rows(self, db, batch):
+        for sql, params in batch:
+            try:
+                with db:
+                    db.execute(sql, params)
+            except sqlite3.Error as e:
+                app.logger.error("Audit write failed: %s", e)
 
-    # Recreate the message that was signed
-    message = json.dumps(cert_data, sort_keys=True).encode('utf-8')
+    def flush(self):
+        """Blocks until every queued row is written."""
+        if self.thread is not None and self.pid == os.getpid():
+            self.queue.join()
+
+audit_writer = AuditWriter()
+
+# --- Verification Logic ---
+
+_keyring = None
+
+def load_keyring():
+    """Loads the legacy public key and every public key in the keys directory."""
+    paths = [path for path in app.config['PUBLIC_KEY_PATHS'] if os.path.exists(path)]
+    return Keyring(paths)
+
+def get_keyring():
+    """Returns the process-wide keyring, loaded once per worker.
+
+    It also caches verified batch roots across requests.
+    """
+    global _keyring
+    if _keyring is None or not len(_keyring):
+        _keyring = load_keyring()
+    return _keyring
+
+def verify_certificate_data(cert_data):
+    """Verifies a parsed certificate dict. Returns (is_valid, message)."""
+    keyring = get_keyring()
+    if not len(keyring):
+        return False, "Public key not found on server."
+    if not isinstance(cert_data, dict):
+        return False, "Invalid certificate format."
 
     try:
-        public_key.verify(
-            signature,
-            message,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.MGF1.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
-        return True, "Certificate is authentic."
-    except InvalidSignature:
-        return False, "Signature is invalid. The certificate may have been tampered with."
+        return keyring.verify(cert_data)
     except Exception as e:
         return False, f"An unexpected error occurred: {e}"
 
+# --- Result Cache ---
+
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+def lookup_cached_result(digest):
+    """Returns (key_id, is_valid, message) from memory or SQLite, or None."""
+    with _result_cache_lock:
+        cached = _result_cache.get(digest)
+        if cached is not None:
+            _result_cache.move_to_end(digest)
+            return cached
+    row = get_db().execute(
+        'SELECT key_id, is_authentic, result_message FROM verification_cache WHERE digest = ?', (digest,)
+    ).fetchone()
+    if row is None:
+        return None
+    cached = (row['key_id'], bool(row['is_authentic']), row['result_message'])
+    remember_result(digest, cached)
+    return cached
+
+def remember_result(digest, cached):
+    with _result_cache_lock:
+        _result_cache[digest] = cached
+        _result_cache.move_to_end(digest)
+        if len(_result_cache) > app.config['RESULT_CACHE_SIZE']:
+            _result_cache.popitem(last=False)
+
+def store_result(digest, cached):
+    remember_result(digest, cached)
+    audit_writer.write(
+        'INSERT OR REPLACE INTO verification_cache (digest, key_id, is_authentic, result_message, verified_at) VALUES (?, ?, ?, ?, ?)',
+        (digest, cached[0], cached[1], cached[2], datetime.utcnow())
+    )
+
+def verify_certificate_cached(cert_data, digest=None):
+    """Like verify_certificate_data(), but reuses earlier verdicts.
+
+    Only verdicts reached with a known key are cached, and a cached verdict
+    is only reused while that key is still in the keyring.
+    """
+    if not isinstance(cert_data, dict):
+        return verify_certificate_data(cert_data)
+    keyring = get_keyring()
+    digest = digest or certificate_digest(cert_data)
+    cached = lookup_cached_result(digest)
+    if cached is not None and cached[0] in keyring.keys:
+        return cached[1], cached[2]
+
+    is_valid, message = verify_certificate_data(cert_data)
+    kid = keyring.certificate_key_id(cert_data)
+    if kid in keyring.keys:
+        store_result(digest, (kid, is_valid, message))
+    return is_valid, message
+
+def verify_certificate_bytes(data):
+    """Verifies a certificate from its raw JSON bytes, without touching disk."""
+    try:
+        cert_data = json.loads(data)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return False, "Invalid JSON format."
+    return verify_certificate_cached(cert_data)
+
+def verify_certificate_signature(certificate_path):
+    with open(certificate_path, "rb") as f:
+        return verify_certificate_bytes(f.read())
+
+# --- Bulk Verification ---
+
+TOO_LARGE_MESSAGE = "Certificate is too large."
+
+# Pool processes are started from a clean server process rather than forked
+# from a request worker, which already runs the audit thread and holds
+# SQLite handles.
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool = None
+
+def _init_pool_worker(public_key_paths):
+    global _keyring
+    _keyring = Keyring(public_key_paths)
+
+def get_pool():
+    """Returns the worker's process pool; each pool process loads the keyring once."""
+    global _pool
+    if _pool is None:
+        paths = [path for path in app.config['PUBLIC_KEY_PATHS'] if os.path.exists(path)]
+        _pool = ProcessPoolExecutor(app.config['BULK_WORKERS'], mp_context=multiprocessing.get_context(POOL_START_METHOD),
+                                    initializer=_init_pool_worker, initargs=(paths,))
+    return _pool
+
+def verify_chunk(items):
+    """Verifies a list of (name, raw JSON bytes) in a pool process.
+
+    An item whose data is a str instead of bytes could not be read; the
+    string is its error message. Returns (name, certificateId, is_valid,
+    message) tuples in order.
+    """
+    results = []
+    for name, data in items:
+        if isinstance(data, str):
+            results.append((name, None, False, data))
+            continue
+        try:
+            cert_data = json.loads(data)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            results.append((name, None, False, "Invalid JSON format."))
+            continue
+        is_valid, message = verify_certificate_data(cert_data)
+        certificate_id = cert_data.get("certificateId") if isinstance(cert_data, dict) else None
+        results.append((name, certificate_id, is_valid, message))
+    return results
+
+def iter_zip_certificates(archive):
+    """Yields (name, bytes) for every .json member of a zip archive.
+
+    Members that cannot be read (too large, corrupt, encrypted) are
+    yielded with an error message instead of bytes.
+    """
+    for info in archive.infolist():
+        if info.is_dir() or not info.filename.endswith('.json'):
+            continue
+        if info.file_size > app.config['MAX_CONTENT_LENGTH']:
+            yield info.filename, TOO_LARGE_MESSAGE
+            continue
+        try:
+            data = archive.read(info)
+        except (zipfile.BadZipFile, zlib.error, EOFError):
+            data = "Corrupt zip member."
+        except (RuntimeError, NotImplementedError):
+            data = "Encrypted or unsupported zip member."
+        yield info.filename, data
+
+def iter_ndjson_certificates(stream):
+    """Yields (line number, bytes) for every non-empty line of an NDJSON stream.
+
+    Lines longer than MAX_CONTENT_LENGTH are skipped and yielded with an
+    error message instead of bytes.
+    """
+    line_limit = app.config['MAX_CONTENT_LENGTH']
+    number = 0
+    while True:
+        line = stream.readline(line_limit + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > line_limit and not line.endswith(b"\n"):
+            # Discard the rest of the oversized line
+            rest = line
+            while rest and not rest.endswith(b"\n"):
+                rest = stream.readline(line_limit)
+            yield f"line {number}", TOO_LARGE_MESSAGE
+        elif line.strip():
+            yield f"line {number}", line
+
+def iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def verify_stream(items):
+    """Verifies certificates across the process pool, yielding results in input order.
+
+    Only a bounded number of chunks is in flight, so a large upload is
+    never held in memory as pending results.
+    """
+    pool = get_pool()
+    max_pending = max(1, app.config['BULK_WORKERS'] * app.config['BULK_PREFETCH'])
+    pending = deque()
+    for chunk in iter_chunks(items, app.config['BULK_CHUNK_SIZE']):
+        pending.append(pool.submit(verify_chunk, chunk))
+        if len(pending) >= max_pending:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+def log_verification(filename, is_valid, message, certificate_id=None):
+    """Queues an audit row; the background writer commits it."""
+    audit_writer.write(
+        'INSERT INTO verifications (filename, verified_at, is_authentic, result_message, certificate_id) VALUES (?, ?, ?, ?, ?)',
+        (filename, datetime.utcnow(), is_valid, message,
+         None if certificate_id is None else str(certificate_id))
+    )
+
 # --- Routes ---
 
 @app.route('/', methods=['GET', 'POST'])
@@ -89,26 +408,218 @@ def upload_file():
         if file.filename == '':
             return redirect(request.url)
         if file and file.filename.endswith('.json'):
-            if not os.path.exists(app.config['UPLOAD_FOLDER']):
-                os.makedirs(app.config['UPLOAD_FOLDER'])
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-            file.save(filepath)
-            
-            is_valid, message = verify_certificate_signature(filepath)
+            # Verified straight from the request, never saved to disk
+            is_valid, message = verify_certificate_bytes(file.read())
 
             # Log the attempt
-            db = get_db()
-            db.execute(
-                'INSERT INTO verifications (filename, verified_at, is_authentic, result_message) VALUES (?, ?, ?, ?)',
-                (file.filename, datetime.utcnow(), is_valid, message)
-            )
-            db.commit()
+            log_verification(file.filename, is_valid, message)
 
             return render_template('result.html', is_valid=is_valid, message=message, filename=file.filename)
 
     return render_template('index.html')
 
+def cacheable(response, digest):
+    """Adds the certificate digest as ETag and allows clients to reuse the result."""
+    response.set_etag(digest)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['RESULT_MAX_AGE']
+    return response
+
+def not_modified(digest):
+    """Returns a 304 if the client already holds the result for `digest`."""
+    if digest in request.if_none_match:
+        return cacheable(Response(status=304), digest)
+    return None
+
+def parse_certificate_text(text):
+    """Parses certificate JSON or an offline QR payload (SD1:/SD0:). Returns a dict or None."""
+    text = text.strip()
+    try:
+        if is_certificate_payload(text):
+            return decode_certificate(text)
+        cert_data = json.loads(text)
+    except ValueError:  # Includes JSONDecodeError
+        return None
+    return cert_data if isinstance(cert_data, dict) else None
+
+def parse_certificate_param():
+    """Parses the "cert" query parameter: certificate JSON or an offline QR payload."""
+    return parse_certificate_text(request.args.get('cert', ''))
+
+@app.route('/api/verify', methods=['GET', 'POST'])
+def api_verify():
+    """Verifies a certificate given as the request body or as ?cert=.
+
+    Either form may be certificate JSON or a scanned offline QR payload.
+    """
+    if request.method == 'GET':
+        cert_data = parse_certificate_param()
+    else:
+        try:
+            cert_data = parse_certificate_text(request.get_data(cache=False).decode('utf-8'))
+        except UnicodeDecodeError:
+            cert_data = None
+    if cert_data is None:
+        return jsonify(valid=False, message="Invalid certificate format."), 400
+
+    digest = certificate_digest(cert_data)
+    cached_response = not_modified(digest)
+    if cached_response is not None:
+        return cached_response
+
+    is_valid, message = verify_certificate_cached(cert_data, digest)
+    certificate_id = cert_data.get("certificateId")
+    log_verification("api", is_valid, message, certificate_id)
+    return cacheable(jsonify(valid=is_valid, message=message, certificateId=certificate_id), digest)
+
+@app.route('/verify')
+def verify_link():
+    """Result page for the verification link encoded in certificate QR codes."""
+    cert_data = parse_certificate_param()
+    if cert_data is None:
+        return render_template('result.html', is_valid=False, message="Invalid certificate format.", filename=None), 400
+
+    digest = certificate_digest(cert_data)
+    cached_response = not_modified(digest)
+    if cached_response is not None:
+        return cached_response
+
+    is_valid, message = verify_certificate_cached(cert_data, digest)
+    log_verification("qr", is_valid, message, cert_data.get("certificateId"))
+    response = app.make_response(render_template('result.html', is_valid=is_valid, message=message, filename=None))
+    return cacheable(response, digest)
+
+@app.route('/verify/<certificate_id>')
+def verify_registered(certificate_id):
+    """Result page for a registered certificate, as linked from QR codes.
+
+    The link carries the certificate id and a short digest ("d"); the
+    certificate itself comes from the registry.
+    """
+    row = get_db().execute(
+        'SELECT digest, certificate FROM certificates WHERE certificate_id = ?', (certificate_id,)
+    ).fetchone()
+    if row is None:
+        message = "This certificate has not been registered. Upload its certificate.json instead."
+        return render_template('result.html', is_valid=False, message=message, filename=None), 404
+
+    digest = row['digest']
+    expected = request.args.get('d', '')
+    if not hmac.compare_digest(expected.lower(), digest[:SHORT_DIGEST_LENGTH]):
+        message = "The link does not match the registered certificate."
+        log_verification("link", False, message, certificate_id)
+        return render_template('result.html', is_valid=False, message=message, filename=None), 409
+
+    cached_response = not_modified(digest)
+    if cached_response is not None:
+        return cached_response
+
+    is_valid, message = verify_certificate_cached(json.loads(row['certificate']), digest)
+    log_verification("link", is_valid, message, certificate_id)
+    response = app.make_response(render_template('result.html', is_valid=is_valid, message=message, filename=None))
+    return cacheable(response, digest)
+
+def iter_ingest_certificates():
+    """Yields (certificate, error message or None) from a JSON array or an NDJSON body."""
+    if request.mimetype == 'application/json':
+        certificates = json.loads(request.get_data(cache=False))
+        for cert_data in (certificates if isinstance(certificates, list) else [certificates]):
+            yield cert_data, None
+        return
+    for _, line in iter_ndjson_certificates(request.stream):
+        if isinstance(line, str):
+            yield None, line
+        else:
+            yield json.loads(line), None
+
+@app.route('/api/certificates', methods=['POST'])
+def api_register_certificates():
+    """Registers certificates issued by a station (JSON array or NDJSON).
+
+    Only certificates whose signature verifies are stored. An id that is
+    already registered with different content is rejected.
+    """
+    request.max_content_length = app.config['BULK_MAX_CONTENT_LENGTH']
+    keyring = get_keyring()
+    rows = []
+    rejected = []
+    try:
+        for cert_data, error in iter_ingest_certificates():
+            if error is not None:
+                rejected.append({"certificateId": None, "message": error})
+                continue
+            certificate_id = cert_data.get("certificateId") if isinstance(cert_data, dict) else None
+            if not certificate_id:
+                rejected.append({"certificateId": None, "message": "Missing certificateId."})
+                continue
+            digest = certificate_digest(cert_data)
+            is_valid, message = verify_certificate_cached(cert_data, digest)
+            if not is_valid:
+                rejected.append({"certificateId": certificate_id, "message": message})
+                continue
+            rows.append((str(certificate_id), digest, json.dumps(cert_data, sort_keys=True),
+                         keyring.certificate_key_id(cert_data), datetime.utcnow()))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return jsonify(message="Invalid JSON format."), 400
+
+    db = get_db()
+    with db:
+        db.executemany(
+            'INSERT OR IGNORE INTO certificates (certificate_id, digest, certificate, key_id, registered_at) VALUES (?, ?, ?, ?, ?)',
+            rows
+        )
+    registered = dict(db.execute(
+        'SELECT certificate_id, digest FROM certificates WHERE certificate_id IN (SELECT value FROM json_each(?))',
+        (json.dumps([row[0] for row in rows]),)
+    ).fetchall()) if rows else {}
+
+    accepted = 0
+    for certificate_id, digest, *_ in rows:
+        if registered.get(certificate_id) == digest:
+            accepted += 1
+        else:
+            rejected.append({"certificateId": certificate_id, "message": "A different certificate is registered with this id."})
+    return jsonify(accepted=accepted, rejected=rejected)
+
+@app.route('/api/verify/bulk', methods=['POST'])
+def api_verify_bulk():
+    """Verifies a zip archive or NDJSON stream of certificates.
+
+    Results are streamed back as NDJSON, one line per certificate as soon
+    as it is verified, followed by a summary line.
+    """
+    request.max_content_length = app.config['BULK_MAX_CONTENT_LENGTH']
+    content_type = request.mimetype
+    stream = request.stream
+    if content_type in ('application/zip', 'application/x-zip-compressed'):
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(stream.read()))
+        except zipfile.BadZipFile:
+            return jsonify(valid=False, message="Invalid zip archive."), 400
+        items = iter_zip_certificates(archive)
+    elif content_type in ('application/x-ndjson', 'application/jsonl', 'application/json-seq'):
+        items = iter_ndjson_certificates(stream)
+    else:
+        return jsonify(valid=False, message="Send a zip archive or NDJSON stream of certificates."), 415
+
+    def generate():
+        total = authentic = 0
+        for name, certificate_id, is_valid, message in verify_stream(items):
+            total += 1
+            authentic += bool(is_valid)
+            log_verification(name, is_valid, message, certificate_id)
+            yield json.dumps({"name": name, "certificateId": certificate_id, "valid": is_valid, "message": message}) + "\n"
+        yield json.dumps({"summary": {"total": total, "valid": authentic, "invalid": total - authentic}}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.errorhandler(413)
+def request_too_large(error):
+    message = TOO_LARGE_MESSAGE
+    if request.path.startswith('/api/'):
+        return jsonify(valid=False, message=message), 413
+    return render_template('result.html', is_valid=False, message=message, filename=None), 413
+
 if __name__ == '__main__':
-    if not os.path.exists(app.config['DATABASE']):
-        init_db() # Initialize the database if it doesn't exist
+    init_db() # Creates or upgrades the database; existing rows are kept
     app.run(debug=True)
@@ -1,10 +1,32 @@
+-- Applied on every start; every statement must be safe to re-run.
 
-DROP TABLE IF EXISTS verifications;
-
-CREATE TABLE verifications (
+CREATE TABLE IF NOT EXISTS verifications (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   filename TEXT NOT NULL,
   verified_at TIMESTAMP NOT NULL,
   is_authentic BOOLEAN NOT NULL,
-  result_message TEXT NOT NULL
+  result_message TEXT NOT NULL,
+  certificate_id TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_verifications_certificate_id ON verifications (certificate_id);
+CREATE INDEX IF NOT EXISTS idx_verifications_verified_at ON verifications (verified_at);
+CREATE INDEX IF NOT EXISTS idx_verifications_is_authentic ON verifications (is_authentic, verified_at);
+
+CREATE TABLE IF NOT EXISTS verification_cache (
+  digest TEXT PRIMARY KEY,
+  key_id TEXT,
+  is_authentic BOOLEAN NOT NULL,
+  result_message TEXT NOT NULL,
+  verified_at TIMESTAMP NOT NULL
+);
+
+-- Certificates registered by the wiping stations, looked up by the short
+-- verification links in their QR codes.
+CREATE TABLE IF NOT EXISTS certificates (
+  certificate_id TEXT PRIMARY KEY,
+  digest TEXT NOT NULL,
+  certificate TEXT NOT NULL,
+  key_id TEXT,
+  registered_at TIMESTAMP NOT NULL
 );
@@ -1,32 +1,263 @@
-
+import hashlib
 import json
+import os
+import threading
+from collections import OrderedDict
+from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
 from cryptography.hazmat.primitives import serialization
 
-def verify_signature(certificate_path, public_key_path):
-    """Verifies the signature of a certificate using the public key."""
-    with open(public_key_path, "rb") as key_file:
-        public_key = serialization.load_pem_public_key(
-            key_file.read(),
-        )
+from qr_payload import decode_certificate
 
-    with open(certificate_path, "r") as f:
-        certificate_with_signature = json.load(f)
+# Values of the certificate "signatureAlgorithm" field.
+RSA_PSS_SHA256 = "RSA-PSS-SHA256"
+ED25519 = "Ed25519"
+ECDSA_P256_SHA256 = "ECDSA-P256-SHA256"
 
-    signature = bytes.fromhex(certificate_with_signature.pop("signature"))
-    certificate_string = json.dumps(certificate_with_signature, sort_keys=True).encode('utf-8')
+SIGNATURE_ALGORITHMS = (RSA_PSS_SHA256, ED25519, ECDSA_P256_SHA256)
 
-    try:
+# Hex characters of the SubjectPublicKeyInfo digest used as the key id.
+KEY_ID_LENGTH = 16
+
+# Batch certificates are signed over a Merkle root rather than their own
+# JSON. Leaves and inner nodes are hashed with distinct prefixes (as in
+# RFC 6962) so an inner node can never pass for a certificate.
+MERKLE_LEAF_PREFIX = b"\x00"
+MERKLE_NODE_PREFIX = b"\x01"
+BATCH_ROOT_CONTEXT = b"shunya-certificate-batch-v1:"
+
+# Hex characters of the certificate digest carried in verification links.
+SHORT_DIGEST_LENGTH = 16
+
+# Verified batch root signatures remembered per keyring.
+ROOT_CACHE_SIZE = 1024
+
+def key_algorithm(key):
+    """Returns the signature algorithm name for a private or public key."""
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return ED25519
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if isinstance(key.curve, ec.SECP256R1):
+            return ECDSA_P256_SHA256
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return RSA_PSS_SHA256
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+def key_id(public_key):
+    """Returns a short, stable id for a public key (a SHA-256 of its SPKI DER)."""
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).hexdigest()[:KEY_ID_LENGTH]
+
+def certificate_message(certificate_data):
+    """Returns the bytes that are signed: the certificate without its signature."""
+    return json.dumps(certificate_data, sort_keys=True).encode('utf-8')
+
+def certificate_digest(certificate_with_signature):
+    """Returns a hex SHA-256 identifying a signed certificate exactly.
+
+    Covers the canonical JSON of every field, signature and batch proof
+    included, so two certificates share a digest only if they are identical.
+    """
+    return hashlib.sha256(certificate_message(certificate_with_signature)).hexdigest()
+
+def short_digest(certificate_with_signature):
+    """Returns the digest prefix that verification links carry."""
+    return certificate_digest(certificate_with_signature)[:SHORT_DIGEST_LENGTH]
+
+def merkle_leaf(certificate_data):
+    """Returns the Merkle leaf hash of a certificate (without signature or proof)."""
+    return hashlib.sha256(MERKLE_LEAF_PREFIX + certificate_message(certificate_data)).digest()
+
+def merkle_node(left, right):
+    return hashlib.sha256(MERKLE_NODE_PREFIX + left + right).digest()
+
+def batch_root_message(root):
+    """Returns the bytes signed for a batch: the Merkle root with a context prefix."""
+    return BATCH_ROOT_CONTEXT + root
+
+def merkle_root_from_proof(leaf, path):
+    """Walks an inclusion proof from a leaf up to the root.
+
+    `path` is a list of [side, hex hash] pairs, side "L" or "R" being the
+    position of the sibling.
+    """
+    node = leaf
+    for side, sibling_hex in path:
+        sibling = bytes.fromhex(sibling_hex)
+        if side == "L":
+            node = merkle_node(sibling, node)
+        elif side == "R":
+            node = merkle_node(node, sibling)
+        else:
+            raise ValueError(f"Invalid proof step: {side}")
+    return node
+
+def sign_message(private_key, message):
+    """Signs `message` with the scheme that matches the key type."""
+    algorithm = key_algorithm(private_key)
+    if algorithm == ED25519:
+        return private_key.sign(message)
+    if algorithm == ECDSA_P256_SHA256:
+        return private_key.sign(message, ec.ECDSA(hashes.SHA256()))
+    return private_key.sign(
+        message,
+        padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()),
+            salt_length=padding.PSS.MAX_LENGTH
+        ),
+        hashes.SHA256()
+    )
+
+def verify_message(public_key, algorithm, signature, message):
+    """Verifies a signature; raises InvalidSignature if it does not match."""
+    if key_algorithm(public_key) != algorithm:
+        raise InvalidSignature(f"Key is not an {algorithm} key")
+    if algorithm == ED25519:
+        public_key.verify(signature, message)
+    elif algorithm == ECDSA_P256_SHA256:
+        public_key.verify(signature, message, ec.ECDSA(hashes.SHA256()))
+    else:
         public_key.verify(
             signature,
-            certificate_string,
+            message,
             padding.PSS(
                 mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.MGF1.MAX_LENGTH
+                salt_length=padding.PSS.MAX_LENGTH
             ),
             hashes.SHA256()
         )
-        return True
+
+class Keyring:
+    """Public keys indexed by key id.
+
+    A certificate names its key with "keyId" and is checked against that key
+    only. Certificates from before key ids existed carry neither "keyId" nor
+    "signatureAlgorithm"; they are RSA-PSS and are checked against the first
+    RSA key loaded (the legacy public_key.pem).
+
+    Batch certificates carry a "batchProof" linking them to a signed Merkle
+    root. Each root signature is checked once and then remembered, so
+    verifying a whole batch costs a single public-key operation.
+    """
+    def __init__(self, paths=()):
+        self.keys = {}
+        self.legacy_key_id = None
+        self.verified_roots = OrderedDict()
+        self.roots_lock = threading.Lock()
+        for path in paths:
+            self.load(path)
+
+    def add(self, public_key):
+        """Adds a public key and returns its key id."""
+        kid = key_id(public_key)
+        self.keys[kid] = public_key
+        if self.legacy_key_id is None and key_algorithm(public_key) == RSA_PSS_SHA256:
+            self.legacy_key_id = kid
+        return kid
+
+    def load(self, path):
+        """Loads a public key PEM file, or every public key PEM in a directory."""
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".pem"):
+                    try:
+                        self.load(os.path.join(path, name))
+                    except ValueError:
+                        pass  # Private keys and other PEM files
+            return
+        with open(path, "rb") as key_file:
+            self.add(serialization.load_pem_public_key(key_file.read()))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def certificate_key_id(self, certificate_data):
+        """Returns the id of the key a certificate is checked against, or None."""
+        kid = certificate_data.get("keyId", self.legacy_key_id)
+        # keyId comes from the certificate, so it may be any JSON value
+        return kid if isinstance(kid, str) else None
+
+    def verify(self, certificate_with_signature):
+        """Verifies a certificate dict that includes its hex "signature".
+
+        Returns (is_valid, message).
+        """
+        certificate_data = dict(certificate_with_signature)
+        signature_hex = certificate_data.pop("signature", None)
+        batch_proof = certificate_data.pop("batchProof", None)
+        if not signature_hex:
+            return False, "No signature found in certificate."
+        try:
+            signature = bytes.fromhex(signature_hex)
+        except (TypeError, ValueError):
+            return False, "Invalid signature format."
+
+        kid = self.certificate_key_id(certificate_data)
+        algorithm = certificate_data.get("signatureAlgorithm", RSA_PSS_SHA256)
+        if algorithm not in SIGNATURE_ALGORITHMS:
+            return False, f"Unsupported signature algorithm: {algorithm}"
+        public_key = self.keys.get(kid)
+        if public_key is None:
+            return False, "The signing key is not known to this verifier."
+
+        if batch_proof is not None:
+            return self.verify_batch(certificate_data, batch_proof, kid, algorithm, signature)
+
+        try:
+            verify_message(public_key, algorithm, signature, certificate_message(certificate_data))
+            return True, "Certificate is authentic."
+        except InvalidSignature:
+            return False, "Signature is invalid. The certificate may have been tampered with."
+
+    def verify_batch(self, certificate_data, batch_proof, kid, algorithm, signature):
+        """Checks a certificate's inclusion proof and its batch root signature."""
+        try:
+            root = merkle_root_from_proof(merkle_leaf(certificate_data), batch_proof["path"])
+            declared_root = bytes.fromhex(batch_proof["root"])
+        except (KeyError, TypeError, ValueError):
+            return False, "Invalid batch proof format."
+        if root != declared_root:
+            return False, "Batch proof does not match. The certificate may have been tampered with."
+
+        cache_key = (kid, algorithm, root, signature)
+        with self.roots_lock:
+            if cache_key in self.verified_roots:
+                self.verified_roots.move_to_end(cache_key)
+                return True, "Certificate is authentic."
+
+        try:
+            verify_message(self.keys[kid], algorithm, signature, batch_root_message(root))
+        except InvalidSignature:
+            return False, "Batch signature is invalid. The certificate may have been tampered with."
+
+        with self.roots_lock:
+            self.verified_roots[cache_key] = True
+            if len(self.verified_roots) > ROOT_CACHE_SIZE:
+                self.verified_roots.popitem(last=False)
+        return True, "Certificate is authentic."
+
+def verify_signature(certificate_path, public_key_path):
+    """Verifies the signature of a certificate using the public key."""
+    keyring = Keyring([public_key_path])
+
+    with open(certificate_path, "r") as f:
+        certificate_with_signature = json.load(f)
+
+    try:
+        is_valid, _ = keyring.verify(certificate_with_signature)
+        return is_valid
+    except Exception:
+        return False
+
+def verify_qr_payload(payload, public_key_path):
+    """Verifies a certificate scanned from an offline QR code (SD1:/SD0: payload)."""
+    keyring = Keyring([public_key_path])
+    try:
+        is_valid, _ = keyring.verify(decode_certificate(payload))
+        return is_valid
     except Exception:
         return False
@@ -0,0 +1,460 @@
+import errno
+import mmap
+import os
+import stat
+import threading
+import time
+
+# Size of each sequential write. Large writes keep the drive streaming at its
+# sequential rate instead of paying per-request overhead.
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# O_DIRECT requires buffers, offsets and lengths aligned to the logical block
+# size. mmap'd buffers are page aligned, which covers every common device.
+ALIGNMENT = mmap.PAGESIZE
+
+# Minimum seconds between "% done" progress lines.
+PROGRESS_INTERVAL = 0.2
+
+# Errors that indicate failing media rather than a vanished device.
+MEDIA_ERRNOS = {errno.EIO, errno.ETIMEDOUT, errno.EREMOTEIO}
+
+# Near a media error or latency spike, writes drop to this size so a bad
+# sector only costs its own unit. Must be a multiple of the logical block size.
+CAREFUL_UNIT_SIZE = 4096
+MAX_UNIT_RETRIES = 2
+# Seconds spent retrying around one failing block before giving up on it.
+RETRY_TIME_BUDGET = 30.0
+
+# A write this many times slower than the running average (and at least
+# MIN_SPIKE_SECONDS) counts as a latency spike.
+LATENCY_SPIKE_FACTOR = 8.0
+MIN_SPIKE_SECONDS = 0.5
+
+# A pass is either a fixed byte pattern or None for a random pass.
+RANDOM_PASS = None
+
+# The 27 deterministic Gutmann patterns, in the order of the original paper.
+GUTMANN_PATTERNS = [
+    b"\x55", b"\xaa",
+    b"\x92\x49\x24", b"\x49\x24\x92", b"\x24\x92\x49",
+    b"\x00", b"\x11", b"\x22", b"\x33", b"\x44", b"\x55", b"\x66", b"\x77",
+    b"\x88", b"\x99", b"\xaa", b"\xbb", b"\xcc", b"\xdd", b"\xee", b"\xff",
+    b"\x92\x49\x24", b"\x49\x24\x92", b"\x24\x92\x49",
+    b"\x6d\xb6\xdb", b"\xb6\xdb\x6d", b"\xdb\x6d\xb6",
+]
+
+# Final zero pass, matching nwipe's default blanking behaviour.
+BLANK_PATTERN = b"\x00"
+
+def get_wipe_passes(method):
+    """Returns the list of passes for an nwipe method name (see WIPE_METHODS)."""
+    if method == "dodshort":
+        # Same layout as nwipe: a random byte, its complement, then random data.
+        value = os.urandom(1)[0]
+        passes = [bytes([value]), bytes([value ^ 0xFF]), RANDOM_PASS]
+    elif method == "nist800-88":
+        passes = [b"\x00"]
+    elif method == "gutmann":
+        passes = [RANDOM_PASS] * 4 + list(GUTMANN_PATTERNS) + [RANDOM_PASS] * 4
+    elif method == "random":
+        passes = [RANDOM_PASS]
+    else:
+        raise ValueError(f"Unknown wipe method: {method}")
+
+    if passes[-1] != BLANK_PATTERN:
+        passes.append(BLANK_PATTERN)
+    return passes
+
+def get_device_size(path):
+    """Returns the size in bytes of a block device or file, or None if unreadable."""
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    except OSError:
+        return None
+    try:
+        return os.lseek(fd, 0, os.SEEK_END)
+    finally:
+        os.close(fd)
+
+def describe_pass(pattern):
+    """Returns a short human readable label for a pass."""
+    if pattern is RANDOM_PASS:
+        return "random"
+    return "pattern 0x" + pattern.hex()
+
+def allocate_buffer(size):
+    """Allocates a page-aligned buffer suitable for O_DIRECT I/O."""
+    if size <= 0 or size % ALIGNMENT:
+        raise ValueError(f"Buffer size must be a positive multiple of {ALIGNMENT}")
+    return mmap.mmap(-1, size)
+
+def fill_pattern(buffer, pattern):
+    """Tiles a byte pattern across the whole buffer.
+
+    Multi-byte patterns restart at every I/O block, so the block size does not
+    need to be a multiple of the pattern length.
+    """
+    size = len(buffer)
+    buffer[:] = (pattern * (size // len(pattern) + 1))[:size]
+
+class WipeTarget:
+    """A block device or regular file opened for overwriting.
+
+    Block devices (including loop devices) are opened with O_DIRECT so writes
+    bypass the page cache. Regular files, such as sparse test images, use
+    buffered I/O and are flushed at the end of every pass.
+    """
+    def __init__(self, path):
+        self.path = path
+        mode = os.stat(path).st_mode
+        self.is_block_device = stat.S_ISBLK(mode)
+        if not (self.is_block_device or stat.S_ISREG(mode)):
+            raise ValueError(f"{path} is neither a block device nor a regular file")
+
+        self.direct = False
+        flags = os.O_WRONLY | getattr(os, "O_CLOEXEC", 0)
+        if self.is_block_device and hasattr(os, "O_DIRECT"):
+            try:
+                self.fd = os.open(path, flags | os.O_DIRECT)
+                self.direct = True
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                self.fd = os.open(path, flags)
+        else:
+            self.fd = os.open(path, flags)
+
+        self.size = os.lseek(self.fd, 0, os.SEEK_END)
+
+    def write_at(self, data, offset):
+        """Writes all of `data` at `offset`, retrying short writes."""
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(self.fd, view, offset)
+            if written <= 0:
+                raise OSError(errno.EIO, f"Short write at offset {offset}")
+            view = view[written:]
+            offset += written
+
+    def sync(self):
+        os.fsync(self.fd)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Stripe:
+    """A contiguous LBA range of the device written by one worker."""
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.done = start  # Everything below this offset is written
+
+    @property
+    def bytes_done(self):
+        return self.done - self.start
+
+    def write_count(self, block_size):
+        return -(-(self.end - self.start) // block_size)
+
+def split_stripes(size, workers, block_size):
+    """Splits a device into up to `workers` block-aligned stripes."""
+    blocks = -(-size // block_size)
+    workers = max(1, min(workers, blocks))
+    stripes = []
+    start = 0
+    for index in range(workers):
+        end = size if index == workers - 1 else min(size, ((index + 1) * blocks // workers) * block_size)
+        stripes.append(Stripe(start, end))
+        start = end
+    return stripes
+
+def stripe_state(stripes):
+    """Returns stripe progress as [start, end, done] lists."""
+    return [[stripe.start, stripe.end, stripe.done] for stripe in stripes]
+
+def contiguous_offset(stripes):
+    """Returns the highest offset below which every byte has been written.
+
+    `stripes` is a list of [start, end, done] in device order.
+    """
+    offset = 0
+    for start, end, done in stripes:
+        if start != offset:
+            break
+        offset = done
+        if done < end:
+            break
+    return offset
+
+def is_rotational(device_path, sys_block="/sys/block"):
+    """Returns True if sysfs reports the device as rotational (an HDD)."""
+    name = os.path.basename(os.path.realpath(device_path))
+    try:
+        with open(os.path.join(sys_block, name, "queue", "rotational")) as f:
+            return f.read().strip() == "1"
+    except OSError:
+        return False
+
+class MediaErrorLog:
+    """Collects media errors and slow regions seen while writing.
+
+    Shared by all stripe writers of a wipe; ranges are byte offsets, merged
+    as they are added.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bad_ranges = []  # [start, end) byte ranges that could not be written
+        self.slow_regions = 0
+        self.retries = 0
+        self.time_lost = 0.0
+
+    def add_bad_range(self, start, end):
+        with self.lock:
+            ranges = sorted(self.bad_ranges + [[start, end]])
+            merged = [ranges[0]]
+            for range_start, range_end in ranges[1:]:
+                if range_start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], range_end)
+                else:
+                    merged.append([range_start, range_end])
+            self.bad_ranges = merged
+
+    def add_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def add_slow_region(self):
+        with self.lock:
+            self.slow_regions += 1
+
+    def add_time_lost(self, seconds):
+        with self.lock:
+            self.time_lost += max(seconds, 0.0)
+
+    def summary(self, logical_block_size=512):
+        """Returns certificate fields, with bad ranges as inclusive LBA ranges."""
+        with self.lock:
+            return {
+                "badRanges": [[start // logical_block_size, (end - 1) // logical_block_size]
+                              for start, end in self.bad_ranges],
+                "badBytes": sum(end - start for start, end in self.bad_ranges),
+                "slowRegions": self.slow_regions,
+                "retries": self.retries,
+                "timeLostSeconds": round(self.time_lost, 1),
+            }
+
+def logical_block_size(device_path, sys_block="/sys/block"):
+    """Returns the logical block (LBA) size from sysfs, defaulting to 512."""
+    name = os.path.basename(os.path.realpath(device_path))
+    try:
+        with open(os.path.join(sys_block, name, "queue", "logical_block_size")) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 512
+
+def write_careful(target, data, offset, media_log, deadline):
+    """Writes a range in small units, retrying failures until `deadline`.
+
+    Units that still fail are recorded as bad and skipped. Once the
+    deadline has passed each unit gets a single attempt, so a dying region
+    costs bounded time.
+    """
+    for unit_start in range(0, len(data), CAREFUL_UNIT_SIZE):
+        unit = data[unit_start:unit_start + CAREFUL_UNIT_SIZE]
+        attempts = 0
+        while True:
+            try:
+                target.write_at(unit, offset + unit_start)
+                break
+            except OSError as e:
+                if e.errno not in MEDIA_ERRNOS:
+                    raise
+                attempts += 1
+                if attempts > MAX_UNIT_RETRIES or time.monotonic() >= deadline:
+                    media_log.add_bad_range(offset + unit_start, offset + unit_start + len(unit))
+                    break
+                media_log.add_retry()
+
+def write_stripe(target, stripe, buffer, block_size, random_source=None, stop_event=None, media_log=None):
+    """Writes one stripe from `buffer`, or from `random_source` if given.
+
+    Returns early, with `stripe.done` marking how far it got, once
+    `stop_event` is set.
+
+    With a `media_log`, a write error or a latency spike switches to small
+    writes (write_careful) for the affected block and the block after it,
+    then returns to full-size writes. Without one, write errors propagate.
+    """
+    average_latency = None
+    careful_until = stripe.start
+    with memoryview(buffer) as view:
+        while stripe.done < stripe.end:
+            if stop_event is not None and stop_event.is_set():
+                return
+            length = min(block_size, stripe.end - stripe.done)
+            random_buffer = random_source.get() if random_source is not None else None
+            try:
+                with memoryview(random_buffer if random_buffer is not None else buffer) as source:
+                    data = source[:length]
+                    started = time.monotonic()
+                    if media_log is not None and stripe.done < careful_until:
+                        write_careful(target, data, stripe.done, media_log, started + RETRY_TIME_BUDGET)
+                        expected = (average_latency or 0.0) * length / block_size
+                        media_log.add_time_lost(time.monotonic() - started - expected)
+                    else:
+                        try:
+                            target.write_at(data, stripe.done)
+                        except OSError as e:
+                            if media_log is None or e.errno not in MEDIA_ERRNOS:
+                                raise
+                            write_careful(target, data, stripe.done, media_log, time.monotonic() + RETRY_TIME_BUDGET)
+                            media_log.add_time_lost(time.monotonic() - started - (average_latency or 0.0))
+                            careful_until = stripe.done + length + block_size
+                        else:
+                            latency = time.monotonic() - started
+                            if (media_log is not None and average_latency is not None
+                                    and latency > max(LATENCY_SPIKE_FACTOR * average_latency, MIN_SPIKE_SECONDS)):
+                                media_log.add_slow_region()
+                                media_log.add_time_lost(latency - average_latency)
+                                careful_until = stripe.done + length + block_size
+                            elif length == block_size:
+                                average_latency = latency if average_latency is None else average_latency + 0.1 * (latency - average_latency)
+            finally:
+                if random_buffer is not None:
+                    random_source.release(random_buffer)
+            stripe.done += length
+
+def run_native_wipe(device_path, method="dodshort", block_size=DEFAULT_BLOCK_SIZE, workers=1,
+                    passes=None, start_pass=0, resume_stripes=None, stop_event=None,
+                    on_checkpoint=None, checkpoint_interval=30.0, media_log=None):
+    """Overwrites the device in-process and yields its output line by line.
+
+    With `workers` > 1 the device is split into that many LBA stripes,
+    written concurrently with positional writes to keep a deep queue on
+    NVMe drives. Rotational drives always use a single stream.
+
+    For crash-safe resumes, `passes` replays the exact pass list of an
+    earlier run and `start_pass`/`resume_stripes` ([start, end, done]
+    lists) continue it. `on_checkpoint(pass_index, stripes)` is called
+    after the device has been flushed, at most every `checkpoint_interval`
+    seconds, at the end of each pass and when `stop_event` stops the wipe.
+
+    Passing a MediaErrorLog enables adaptive handling of bad sectors: the
+    wipe works around them, records the unwritable ranges in the log and
+    carries on instead of failing.
+
+    Yields lines in the same shape as run_nwipe, including "NN.NN% done"
+    progress lines and a final "ERROR: ..." line on failure.
+    """
+    try:
+        passes = passes if passes is not None else get_wipe_passes(method)
+        if workers > 1 and is_rotational(device_path):
+            workers = 1
+        with WipeTarget(device_path) as target:
+            mode = "O_DIRECT" if target.direct else "buffered"
+            yield (f"Native wipe of {device_path}: {target.size} bytes, {len(passes)} passes, "
+                   f"{block_size // 1024} KiB {mode} writes, {workers} writer(s)")
+            if target.size == 0:
+                yield "ERROR: Device reports a size of 0 bytes."
+                return
+
+            # One aligned buffer per writer, reused for every pass
+            stripe_count = len(split_stripes(target.size, workers, block_size))
+            buffers = [allocate_buffer(block_size) for _ in range(max(stripe_count, len(resume_stripes or [])))]
+            total_bytes = target.size * len(passes)
+
+            def checkpoint(pass_index, stripes):
+                if on_checkpoint is not None:
+                    target.sync()  # Only record what is durable on the media
+                    on_checkpoint(pass_index, stripe_state(stripes))
+
+            try:
+                for pass_index in range(start_pass, len(passes)):
+                    pattern = passes[pass_index]
+                    yield f"Pass {pass_index + 1}/{len(passes)}: {describe_pass(pattern)}"
+                    if pass_index == start_pass and resume_stripes:
+                        stripes = []
+                        for start, end, done in resume_stripes:
+                            stripe = Stripe(start, end)
+                            stripe.done = done
+                            stripes.append(stripe)
+                        yield f"Resuming at offset {contiguous_offset(stripe_state(stripes))}"
+                    else:
+                        stripes = split_stripes(target.size, workers, block_size)
+
+                    random_source = None
+                    if pattern is RANDOM_PASS:
+                        # Imported here because pattern_source builds on this module.
+                        from pattern_source import RandomPatternSource
+                        write_count = sum(-(-(s.end - s.done) // block_size) for s in stripes)
+                        random_source = RandomPatternSource(block_size, max(write_count, 1) * block_size)
+                    else:
+                        for buffer in buffers:
+                            fill_pattern(buffer, pattern)
+
+                    errors = []
+
+                    def worker(stripe, buffer):
+                        try:
+                            write_stripe(target, stripe, buffer, block_size, random_source, stop_event, media_log)
+                        except OSError as e:
+                            errors.append(e)
+
+                    threads = [threading.Thread(target=worker, args=(stripe, buffer), daemon=True)
+                               for stripe, buffer in zip(stripes, buffers)]
+                    last_checkpoint = time.monotonic()
+                    try:
+                        for thread in threads:
+                            thread.start()
+                        # Merge per-stripe progress into one figure while the writers run
+                        alive = threads
+                        while alive:
+                            alive[0].join(PROGRESS_INTERVAL)
+                            alive = [thread for thread in threads if thread.is_alive()]
+                            done = target.size * pass_index + sum(stripe.bytes_done for stripe in stripes)
+                            yield f"{done * 100.0 / total_bytes:.2f}% done"
+                            if alive and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                                checkpoint(pass_index, stripes)
+                                last_checkpoint = time.monotonic()
+                    finally:
+                        for thread in threads:
+                            thread.join()
+                        if random_source is not None:
+                            random_source.close()
+
+                    if errors:
+                        raise errors[0]
+                    if stop_event is not None and stop_event.is_set():
+                        checkpoint(pass_index, stripes)
+                        yield f"Wipe stopped at pass {pass_index + 1}, offset {contiguous_offset(stripe_state(stripes))}."
+                        return
+                    # The pass is complete only once every stripe has reached its end
+                    if any(stripe.done < stripe.end for stripe in stripes):
+                        raise OSError(errno.EIO, f"Pass {pass_index + 1} did not complete")
+                    target.sync()
+                    if pass_index + 1 < len(passes):
+                        checkpoint(pass_index + 1, [])
+            finally:
+                for buffer in buffers:
+                    buffer.close()
+
+            yield "100.00% done"
+            if media_log is not None and (media_log.bad_ranges or media_log.slow_regions):
+                summary = media_log.summary()
+                yield (f"Media errors: {len(summary['badRanges'])} unwritable range(s) ({summary['badBytes']} bytes), "
+                       f"{summary['slowRegions']} slow region(s), {summary['timeLostSeconds']} s lost")
+            yield f"Native wipe of {device_path} completed."
+
+    except OSError as e:
+        yield f"ERROR: Native wipe failed: {e}"
+    except ValueError as e:
+        yield f"ERROR: {e}"
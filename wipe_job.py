@@ -0,0 +1,208 @@
+import threading
+
+from nwipe_handler import build_nwipe_command, run_nwipe, describe_wipe_method
+from purge_handler import PURGE_METHODS, probe_capabilities, select_purge_method, run_purge
+from wipe_engine import (
+    BLANK_PATTERN, DEFAULT_BLOCK_SIZE, MediaErrorLog, get_device_size, get_wipe_passes,
+    logical_block_size, run_native_wipe,
+)
+from wipe_journal import CHECKPOINT_INTERVAL, decode_passes
+from progress_telemetry import ProgressMonitor
+from readback_verifier import ReadbackVerifier
+from io_calibration import get_io_profile
+
+class WipeJob:
+    """Wipes and verifies one disk; shared by the GUI and the command line.
+
+    run() does the whole job on the calling thread, reporting log lines and
+    progress records through callbacks. The outcome is left in `report`
+    as certificate fields.
+    """
+    def __init__(self, device_path, method, is_dry_run=False, engine="nwipe", fallback_engine="nwipe", verify_mode="sample", disk_data=None,
+                 journal=None, resume_job=None):
+        self.device_path = f"/dev/{device_path}"
+        # Inventory entry for the disk (model, serial, rotational flag, ...)
+        self.disk_data = disk_data or {'name': device_path}
+        self.method = method
+        self.is_dry_run = is_dry_run
+        # "nwipe" shells out to nwipe, "native" uses the in-process wipe_engine,
+        # "purge" uses a firmware erase and falls back to `fallback_engine`
+        self.engine = engine
+        self.fallback_engine = fallback_engine
+        # Read-back verification after the wipe: "sample", "full" or None
+        self.verify_mode = verify_mode
+        # Certificate fields describing what was actually done
+        self.report = {}
+        self.wipe_failed = False
+        # Pattern the media should hold afterwards, None if unpredictable
+        self.expected_pattern = None
+        # Native wipes are checkpointed to the journal and can be resumed
+        self.journal = journal
+        self.resume_job = resume_job
+        if resume_job is not None:
+            self.method = resume_job["method"]
+        # Bad sectors the native engine worked around, if any
+        self.media_log = None
+        # Set by cancel(); the engines stop at the next checkpoint instead of being killed
+        self.stop_event = threading.Event()
+
+    def cancel(self):
+        self.stop_event.set()
+
+    @property
+    def cancelled(self):
+        return self.stop_event.is_set()
+
+    def overwrite_output(self, engine):
+        """Yields the output of an overwrite wipe with the given engine."""
+        self.report = {"wipeMethod": describe_wipe_method(self.method, engine)}
+        # Both engines finish with a zero blanking pass
+        self.expected_pattern = BLANK_PATTERN
+        if engine == "native":
+            yield f"Native wipe: {self.device_path} (method={self.method})"
+            lines = self.native_output()
+        else:
+            command = build_nwipe_command(self.device_path, self.method, is_dry_run=False)
+            yield f"Command: {' '.join(command)}"
+            lines = run_nwipe(command, self.stop_event)
+        for line in lines:
+            if line.startswith("ERROR:"):
+                self.wipe_failed = True
+            yield line
+
+    def native_output(self):
+        """Yields the native engine's output, journaling checkpoints so it can be resumed."""
+        job = self.resume_job
+        if job is not None:
+            job_id = job["job"]
+            options = {
+                "block_size": job["blockSize"],
+                "workers": job["workers"],
+                "passes": decode_passes(job["passes"]),
+                "start_pass": job["pass"],
+                "resume_stripes": job["stripes"],
+            }
+            self.report["ioProfile"] = {"blockSize": job["blockSize"], "queueDepth": job["workers"], "source": "journal"}
+            yield f"Resuming interrupted wipe at pass {job['pass'] + 1}, offset {job['offset']}"
+        else:
+            block_size, workers = DEFAULT_BLOCK_SIZE, 1
+            try:
+                profile, source = get_io_profile(self.device_path, self.disk_data)
+            except (OSError, ValueError) as e:
+                yield f"I/O calibration failed ({e}), using defaults."
+            else:
+                block_size, workers = profile["blockSize"], profile["queueDepth"]
+                self.report["ioProfile"] = {
+                    "blockSize": block_size,
+                    "queueDepth": workers,
+                    "rateMBps": profile["rateMBps"],
+                    "source": source,
+                }
+                yield (f"I/O profile ({source}): {block_size // 1024} KiB blocks, "
+                       f"queue depth {workers}, {profile['rateMBps']} MB/s")
+            passes = get_wipe_passes(self.method)
+            options = {"block_size": block_size, "workers": workers, "passes": passes}
+            job_id = None
+            if self.journal is not None:
+                job_id = self.journal.start_job(self.device_path, self.disk_data.get('serial'),
+                                                get_device_size(self.device_path), self.method,
+                                                passes, block_size, workers)
+
+        on_checkpoint = None
+        if self.journal is not None and job_id is not None:
+            on_checkpoint = lambda pass_index, stripes: self.journal.checkpoint(job_id, pass_index, stripes)
+
+        self.media_log = MediaErrorLog()
+        failed = False
+        for line in run_native_wipe(self.device_path, self.method, stop_event=self.stop_event,
+                                    on_checkpoint=on_checkpoint, checkpoint_interval=CHECKPOINT_INTERVAL,
+                                    media_log=self.media_log, **options):
+            failed = failed or line.startswith("ERROR:")
+            yield line
+        self.report["mediaErrors"] = self.media_log.summary(logical_block_size(self.device_path))
+        if on_checkpoint is not None and not failed and not self.cancelled:
+            self.journal.complete(job_id)
+
+    def purge_output(self):
+        """Yields the output of the fastest firmware purge, or of an overwrite if none works."""
+        method = select_purge_method(probe_capabilities(self.device_path))
+        if method is None:
+            yield "No firmware purge method available, falling back to overwrite."
+        else:
+            yield f"Firmware purge: {PURGE_METHODS[method]}"
+            failed = False
+            for line in run_purge(self.device_path, method):
+                failed = failed or line.startswith("ERROR:")
+                yield line
+            if not failed:
+                # Crypto and block erase leave vendor-defined contents behind
+                self.report = {"wipeMethod": PURGE_METHODS[method]}
+                self.expected_pattern = None
+                return
+            yield "Firmware purge failed, falling back to overwrite."
+        yield from self.overwrite_output(self.fallback_engine)
+
+    def run(self, log=print, on_progress=None):
+        """Runs the job. `log(line)` receives log lines, `on_progress(record)` ProgressRecords.
+
+        Returns True if the job ran to the end, False if it was cancelled.
+        """
+        if self.is_dry_run:
+            log("*** DRY RUN MODE ***")
+            if self.engine == "purge":
+                method = select_purge_method(probe_capabilities(self.device_path))
+                log(f"Firmware purge: {PURGE_METHODS.get(method, 'not available, would overwrite')}")
+            elif self.engine == "native":
+                log(f"Native wipe: {self.device_path} (method={self.method})")
+            else:
+                command = build_nwipe_command(self.device_path, self.method, self.is_dry_run)
+                log(f"Command: {' '.join(command)}")
+            return True
+
+        # --- REAL WIPE LOGIC ---
+        log("--- REAL WIPE STARTED ---")
+        if self.engine == "purge":
+            output = self.purge_output()
+        else:
+            output = self.overwrite_output(self.engine)
+
+        # Plain progress lines only feed the monitor; everything else is logged
+        monitor = ProgressMonitor(self.device_path, get_device_size(self.device_path),
+                                  on_line=lambda line: log(line.strip()))
+        if on_progress is not None:
+            monitor.subscribe(on_progress)
+        monitor.run(output)
+
+        if self.cancelled:
+            self.report["status"] = "Cancelled"
+            log("--- WIPE CANCELLED ---")
+            return False
+
+        log("--- REAL WIPE FINISHED ---")
+        self.verify(log)
+        return True
+
+    def verify(self, log=print):
+        """Reads the media back and records the outcome in the report."""
+        if self.wipe_failed:
+            self.report["status"] = "Failed"
+            return
+        if not self.verify_mode or self.expected_pattern is None:
+            self.report["verification"] = {"result": "Not Applicable"}
+            return
+
+        skip_ranges = self.media_log.bad_ranges if self.media_log is not None else None
+        verifier = ReadbackVerifier(self.device_path, self.expected_pattern, mode=self.verify_mode,
+                                    skip_ranges=skip_ranges)
+        try:
+            for line in verifier.run():
+                log(line)
+        except OSError as e:
+            log(f"ERROR: Verification failed: {e}")
+            self.report["verification"] = {"result": "Error", "mode": self.verify_mode, "error": str(e)}
+            self.report["status"] = "Verification Failed"
+            return
+
+        self.report["verification"] = verifier.result
+        if verifier.result["result"] != "Passed":
+            self.report["status"] = "Verification Failed"
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from wipe_engine import contiguous_offset
+
+# The journal lives next to the application, on the boot USB, so it
+# survives a power loss of the wiping station. When running from a
+# zipapp bundle, "next to the application" is next to the archive.
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+if os.path.isfile(_APP_DIR):
+    _APP_DIR = os.path.dirname(_APP_DIR)
+JOURNAL_PATH = os.path.join(_APP_DIR, "wipe_journal.jsonl")
+
+# Minimum seconds between checkpoints. Each checkpoint flushes the device
+# and fsyncs the journal, so they are kept coarse.
+CHECKPOINT_INTERVAL = 30.0
+
+def encode_passes(passes):
+    """Encodes a pass list (bytes patterns / None for random) for the journal."""
+    return [None if pattern is None else pattern.hex() for pattern in passes]
+
+def decode_passes(encoded):
+    return [None if pattern is None else bytes.fromhex(pattern) for pattern in encoded]
+
+class WipeJournal:
+    """Append-only JSON-lines journal of native wipes, for resuming after a crash.
+
+    Each job is recorded as a "start" entry (device identity, method and the
+    exact pass patterns), periodic "checkpoint" entries (current pass and the
+    progress of every stripe) and a final "complete" or "abandon" entry. A
+    job without one can be resumed from its last checkpoint.
+    """
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        with self.lock:
+            # Start from an empty file when nothing is left to resume
+            if os.path.exists(self.path) and not self.pending_jobs():
+                self._rewrite([])
+
+    def _append(self, entry):
+        line = json.dumps(entry, sort_keys=True) + "\n"
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _rewrite(self, entries):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, sort_keys=True) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def read_entries(self):
+        entries = []
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # Torn final line after a power loss
+        except OSError:
+            pass
+        return entries
+
+    def start_job(self, device, serial, size, method, passes, block_size, workers):
+        """Records a new job and returns its id."""
+        job_id = str(uuid.uuid4())
+        self._append({
+            "event": "start",
+            "job": job_id,
+            "device": device,
+            "serial": serial,
+            "size": size,
+            "method": method,
+            "passes": encode_passes(passes),
+            "blockSize": block_size,
+            "workers": workers,
+            "time": datetime.utcnow().isoformat() + "Z",
+        })
+        return job_id
+
+    def checkpoint(self, job_id, pass_index, stripes):
+        """Records progress. `stripes` is a list of [start, end, done]."""
+        self._append({
+            "event": "checkpoint",
+            "job": job_id,
+            "pass": pass_index,
+            "offset": contiguous_offset(stripes),
+            "stripes": stripes,
+            "time": datetime.utcnow().isoformat() + "Z",
+        })
+
+    def complete(self, job_id):
+        self._append({"event": "complete", "job": job_id, "time": datetime.utcnow().isoformat() + "Z"})
+
+    def abandon(self, job_id):
+        """Marks a job as not to be resumed (the operator declined)."""
+        self._append({"event": "abandon", "job": job_id, "time": datetime.utcnow().isoformat() + "Z"})
+
+    def pending_jobs(self):
+        """Returns unfinished jobs with their last checkpoint merged in."""
+        jobs = {}
+        for entry in self.read_entries():
+            job_id = entry.get("job")
+            if entry.get("event") == "start":
+                jobs[job_id] = dict(entry, **{"pass": 0, "offset": 0, "stripes": None})
+            elif entry.get("event") == "checkpoint" and job_id in jobs:
+                jobs[job_id].update({key: entry[key] for key in ("pass", "offset", "stripes")})
+            elif entry.get("event") in ("complete", "abandon"):
+                jobs.pop(job_id, None)
+        return list(jobs.values())
+
+    def find_resumable(self, serial, size):
+        """Returns the latest unfinished job for a device identity, or None."""
+        matches = [job for job in self.pending_jobs()
+                   if job.get("serial") == serial and job.get("size") == size]
+        return matches[-1] if matches else None
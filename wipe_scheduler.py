@@ -0,0 +1,147 @@
+import os
+import re
+import threading
+
+# Maximum number of concurrent wipes per controller, keyed by lsblk transport.
+# USB hubs and SATA port multipliers share bandwidth between ports, so running
+# more drives than the link can feed only makes each wipe slower.
+CONTROLLER_CONCURRENCY = {
+    "usb": 2,
+    "sata": 8,
+    "sas": 8,
+    "ata": 4,
+    "nvme": None,  # Every NVMe drive has its own PCIe lanes
+    "virtual": None,
+}
+DEFAULT_CONCURRENCY = 4
+
+PCI_ADDRESS_REGEX = re.compile(r"^[0-9a-f]{4}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-7]$")
+
+def controller_parent(device_name, sys_block="/sys/block"):
+    """Returns the sysfs path of the controller a block device hangs off.
+
+    This is the deepest PCI function in the device's sysfs path (the HBA, USB
+    host controller or NVMe controller). Devices without one, such as loop
+    devices, return "virtual".
+    """
+    try:
+        path = os.path.realpath(os.path.join(sys_block, device_name))
+    except OSError:
+        return "virtual"
+
+    parts = path.split(os.sep)
+    controller = None
+    for index, part in enumerate(parts):
+        if PCI_ADDRESS_REGEX.match(part):
+            controller = os.sep.join(parts[:index + 1])
+    return controller or "virtual"
+
+def controller_key(disk_data):
+    """Groups a disk (lsblk dict) by transport and controller."""
+    if disk_data.get('type') == 'loop':
+        return ("virtual", "virtual")
+    transport = str(disk_data.get('tran') or 'unknown').lower()
+    return (transport, controller_parent(disk_data.get('name', '')))
+
+class WipeScheduler:
+    """Runs wipes for several disks in parallel, capped per controller.
+
+    The scheduler only decides *when* each disk starts. Callers either drive
+    it from events (start() and job_finished(), as the GUI does with its
+    wipe threads) or call run() to execute a blocking job function on a
+    pool of threads.
+    """
+    def __init__(self, disks, start_job=None, limits=None):
+        self.disks = list(disks)
+        self.start_job = start_job
+        self.limits = dict(CONTROLLER_CONCURRENCY)
+        if limits:
+            self.limits.update(limits)
+
+        self.pending = list(self.disks)
+        self.running = {}  # disk name -> controller key
+        self.finished = []
+        self.lock = threading.Lock()
+        # Set by request_cancel(); pending disks are dropped under the lock
+        self.cancel_requested = threading.Event()
+
+    def limit_for(self, key):
+        return self.limits.get(key[0], DEFAULT_CONCURRENCY)
+
+    def _next_runnable(self):
+        """Pops the next pending disk whose controller has a free slot."""
+        for index, disk in enumerate(self.pending):
+            key = controller_key(disk)
+            limit = self.limit_for(key)
+            in_use = sum(1 for k in self.running.values() if k == key)
+            if limit is None or in_use < limit:
+                self.running[disk['name']] = key
+                return self.pending.pop(index)
+        return None
+
+    def _take_runnable(self):
+        with self.lock:
+            if self.cancel_requested.is_set():
+                self.pending = []
+            ready = []
+            disk = self._next_runnable()
+            while disk is not None:
+                ready.append(disk)
+                disk = self._next_runnable()
+            return ready
+
+    def start(self):
+        """Starts as many jobs as the controller limits allow."""
+        for disk in self._take_runnable():
+            self.start_job(disk)
+
+    def job_finished(self, disk_name):
+        """Marks a disk as done and starts any jobs that can now run."""
+        with self.lock:
+            self.running.pop(disk_name, None)
+            self.finished.append(disk_name)
+        self.start()
+
+    def cancel_pending(self):
+        """Drops the disks that have not started yet and returns them."""
+        with self.lock:
+            dropped, self.pending = self.pending, []
+        return dropped
+
+    def request_cancel(self):
+        """Stops any more disks from starting, without taking the lock.
+
+        Safe to call from a signal handler, which may interrupt the same
+        thread while it holds the lock in start().
+        """
+        self.cancel_requested.set()
+
+    def is_done(self):
+        with self.lock:
+            return not self.pending and not self.running
+
+    def run(self, job):
+        """Runs job(disk) for every disk on worker threads and waits for all.
+
+        Returns a dict of disk name -> job return value.
+        """
+        results = {}
+        all_done = threading.Event()
+
+        def worker(disk):
+            try:
+                results[disk['name']] = job(disk)
+            finally:
+                self.job_finished(disk['name'])
+                if self.is_done():
+                    all_done.set()
+
+        def start_thread(disk):
+            threading.Thread(target=worker, args=(disk,), daemon=True).start()
+
+        self.start_job = start_thread
+        if not self.disks:
+            return results
+        self.start()
+        all_done.wait()
+        return results